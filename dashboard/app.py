@@ -8,44 +8,14 @@ from flask import Flask, render_template, jsonify, request
 from datetime import datetime, timedelta
 import random
 import json
+import execution_store
 
 app = Flask(__name__)
 
 # Mock data generators for HLR reconciliation metrics
-def generate_mock_execution_data():
-    """Generate mock reconciliation execution data"""
-    procedures = [
-        'P1_MAIN_SYS_INTERFACES',
-        'P2_POST_PREP_SERV_INTERFACES',
-        'P3_PREP_INTERFACES',
-        'P4_CP_INTERFACES',
-        'P5_ALFA_CP_INTERFACES',
-        'P6_VOLTE_INTERFACES',
-        'P7_DATACARD_INTERFACES'
-    ]
-
-    executions = []
-    base_time = datetime.now()
-
-    for i in range(50):
-        execution_time = base_time - timedelta(hours=i)
-        procedure = random.choice(procedures)
-        status = random.choices(['SUCCESS', 'FAILED', 'WARNING'], weights=[80, 10, 10])[0]
-
-        executions.append({
-            'id': i + 1,
-            'procedure_name': procedure,
-            'execution_time': execution_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'status': status,
-            'duration_seconds': random.randint(30, 600),
-            'records_processed': random.randint(1000, 50000),
-            'records_inserted': random.randint(0, 5000),
-            'records_updated': random.randint(0, 3000),
-            'records_deleted': random.randint(0, 500),
-            'integration_log_id': f'LOG_{i+1000}'
-        })
-
-    return executions
+def generate_mock_execution_data(limit=None):
+    """Most recent mock reconciliation executions, newest first"""
+    return execution_store.mock_store().rows(limit=limit)
 
 def generate_mock_errors():
     """Generate mock error data"""
@@ -82,75 +52,55 @@ def generate_mock_errors():
 
     return sorted(errors, key=lambda x: x['error_timestamp'], reverse=True)
 
-def generate_system_metrics():
-    """Generate system-wide metrics"""
-    executions = generate_mock_execution_data()
-
-    total_executions = len(executions)
-    successful = len([e for e in executions if e['status'] == 'SUCCESS'])
-    failed = len([e for e in executions if e['status'] == 'FAILED'])
-    warnings = len([e for e in executions if e['status'] == 'WARNING'])
-
-    avg_duration = sum(e['duration_seconds'] for e in executions) / len(executions)
-    total_records = sum(e['records_processed'] for e in executions)
+def generate_system_metrics(days=7):
+    """Generate system-wide metrics over the last `days`"""
+    store = execution_store.mock_store()
+    summary = store.summary(store.select(start=datetime.now() - timedelta(days=days)))
+    total_executions = summary['total'] or 1
 
     return {
-        'total_executions': total_executions,
-        'successful_executions': successful,
-        'failed_executions': failed,
-        'warning_executions': warnings,
-        'success_rate': round((successful / total_executions) * 100, 2),
-        'average_duration_seconds': round(avg_duration, 2),
-        'total_records_processed': total_records,
-        'last_execution_time': executions[0]['execution_time'],
+        'total_executions': summary['total'],
+        'successful_executions': summary['SUCCESS'],
+        'failed_executions': summary['FAILED'],
+        'warning_executions': summary['WARNING'],
+        'success_rate': round((summary['SUCCESS'] / total_executions) * 100, 2),
+        'average_duration_seconds': round(summary['avg_duration'], 2),
+        'total_records_processed': summary['total_records'],
+        'last_execution_time': summary['last_time'],
         'active_errors': len([e for e in generate_mock_errors() if not e['resolved']])
     }
 
-def generate_procedure_performance():
-    """Generate per-procedure performance metrics"""
-    procedures = [
-        'P1_MAIN_SYS_INTERFACES',
-        'P2_POST_PREP_SERV_INTERFACES',
-        'P3_PREP_INTERFACES',
-        'P4_CP_INTERFACES',
-        'P5_ALFA_CP_INTERFACES',
-        'P6_VOLTE_INTERFACES',
-        'P7_DATACARD_INTERFACES'
-    ]
-
+def generate_procedure_performance(days=30):
+    """Generate per-procedure performance metrics over the last `days`"""
+    store = execution_store.mock_store()
     performance = []
-    for proc in procedures:
-        total_runs = random.randint(20, 100)
-        successful = random.randint(int(total_runs * 0.8), total_runs)
-
+    for proc in store.by_procedure(store.select(start=datetime.now() - timedelta(days=days))):
         performance.append({
-            'procedure_name': proc,
-            'total_runs': total_runs,
-            'successful_runs': successful,
-            'failed_runs': total_runs - successful,
-            'success_rate': round((successful / total_runs) * 100, 2),
-            'avg_duration_seconds': random.randint(60, 500),
-            'last_run_time': (datetime.now() - timedelta(hours=random.randint(1, 24))).strftime('%Y-%m-%d %H:%M:%S')
+            'procedure_name': proc['procedure_name'],
+            'total_runs': proc['total_runs'],
+            'successful_runs': proc['successful_runs'],
+            'failed_runs': proc['failed_runs'],
+            'success_rate': round((proc['successful_runs'] / proc['total_runs']) * 100, 2),
+            'avg_duration_seconds': round(proc['avg_duration']),
+            'last_run_time': proc['last_run_time']
         })
 
     return sorted(performance, key=lambda x: x['success_rate'])
 
-def generate_hourly_stats():
+def generate_hourly_stats(hours=24):
     """Generate hourly execution statistics for charts"""
-    hours = []
-    base_time = datetime.now()
-
-    for i in range(24, 0, -1):
-        hour_time = base_time - timedelta(hours=i)
-        hours.append({
-            'hour': hour_time.strftime('%H:00'),
-            'executions': random.randint(5, 30),
-            'successful': random.randint(4, 25),
-            'failed': random.randint(0, 5),
-            'avg_duration': random.randint(120, 400)
-        })
-
-    return hours
+    store = execution_store.mock_store()
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+    executions, successful, failed, avg_duration = store.by_interval(
+        store.select(start=start), start, 3600, hours)
+
+    return [{
+        'hour': (start + timedelta(hours=i)).strftime('%H:00'),
+        'executions': int(executions[i]),
+        'successful': int(successful[i]),
+        'failed': int(failed[i]),
+        'avg_duration': round(avg_duration[i])
+    } for i in range(hours)]
 
 # API Routes
 @app.route('/')
@@ -167,7 +117,7 @@ def get_metrics():
 def get_executions():
     """Get recent reconciliation executions"""
     limit = request.args.get('limit', default=20, type=int)
-    executions = generate_mock_execution_data()[:limit]
+    executions = generate_mock_execution_data(limit)
     return jsonify(executions)
 
 @app.route('/api/errors')
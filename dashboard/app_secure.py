@@ -4,21 +4,66 @@ ALFA HLR Reconciliation System - Secure Dashboard
 Enhanced version with authentication and real database connectivity
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash
+from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from functools import wraps
 from datetime import datetime, timedelta
 import random
 import hashlib
+import json
+import time
 import config
-
-# Try to import Oracle connector
-try:
-    import cx_Oracle
-    ORACLE_AVAILABLE = True
-except ImportError:
-    ORACLE_AVAILABLE = False
-    print("⚠️  cx_Oracle not available. Using mock data.")
+import replica
+import rollups
+import sketches
+import error_index
+import jobs
+import discrepancy_cube
+import execution_store
+
+from db import ORACLE_AVAILABLE, get_oracle_connection
+
+# Local read replica (dashboard reads never touch the reconciliation database)
+local_replica = None
+if config.ENABLE_LOCAL_REPLICA:
+    local_replica = replica.ReadReplica(config.REPLICA_DB_PATH, config.REPLICA_MAX_LAG_SECONDS)
+
+# Stores derived from the replica (rollups, sketches, regressions, error
+# groups, discrepancy cube); each catches up from its own watermark
+rollup_store = None
+sketch_store = None
+discrepancies = None
+regression_detector = None
+error_groups = None
+if local_replica:
+    derived_stores = replica.attach_derived_stores(local_replica, config, get_oracle_connection)
+    rollup_store = derived_stores['rollups']
+    sketch_store = derived_stores['sketches']
+    regression_detector = derived_stores['regressions']
+    error_groups = derived_stores['error_groups']
+    discrepancies = derived_stores['discrepancies']
+    local_replica.catch_up()
+
+# On-demand reconciliation jobs started from the dashboard
+def job_history(procedure):
+    """Typical (records, duration seconds) of a procedure for progress estimates"""
+    if not sketch_store:
+        return None, None
+    end = datetime.now()
+    start = end - timedelta(days=30)
+    duration = sketch_store.merged(procedure, 'duration', start, end).quantile(0.5)
+    rate = sketch_store.merged(procedure, 'records_per_second', start, end).quantile(0.5)
+    return (int(duration * rate) if duration and rate else None), duration
+
+job_runner = jobs.JobRunner(
+    get_oracle_connection,
+    max_concurrent=config.JOB_MAX_CONCURRENT,
+    concurrency_limits=config.JOB_CONCURRENCY_LIMITS,
+    heavy_procedures=config.JOB_HEAVY_PROCEDURES,
+    nightly_window=config.JOB_NIGHTLY_WINDOW_HOURS,
+    history=job_history,
+    schemas=config.JOB_SCHEMA_ALLOWLIST
+)
 
 app = Flask(__name__)
 app.secret_key = config.SECRET_KEY
@@ -58,31 +103,12 @@ def audit_log(action):
         return decorated_function
     return decorator
 
-# Database connection
-def get_oracle_connection():
-    """Get Oracle database connection"""
-    if not ORACLE_AVAILABLE or not config.USE_REAL_DATABASE:
-        return None
-
-    try:
-        dsn = cx_Oracle.makedsn(
-            config.ORACLE_CONFIG['host'],
-            config.ORACLE_CONFIG['port'],
-            service_name=config.ORACLE_CONFIG['service_name']
-        )
-        connection = cx_Oracle.connect(
-            config.ORACLE_CONFIG['username'],
-            config.ORACLE_CONFIG['password'],
-            dsn
-        )
-        return connection
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        return None
-
 # Data fetchers (real database versions)
 def fetch_real_metrics():
-    """Fetch real metrics from Oracle database"""
+    """Fetch real metrics from the local replica or Oracle database"""
+    if local_replica:
+        return local_replica.fetch_metrics()
+
     conn = get_oracle_connection()
     if not conn:
         return None
@@ -134,40 +160,9 @@ def fetch_real_metrics():
     return None
 
 # Mock data generators (keeping existing ones)
-def generate_mock_execution_data():
-    """Generate mock reconciliation execution data"""
-    procedures = [
-        'P1_MAIN_SYS_INTERFACES',
-        'P2_POST_PREP_SERV_INTERFACES',
-        'P3_PREP_INTERFACES',
-        'P4_CP_INTERFACES',
-        'P5_ALFA_CP_INTERFACES',
-        'P6_VOLTE_INTERFACES',
-        'P7_DATACARD_INTERFACES'
-    ]
-
-    executions = []
-    base_time = datetime.now()
-
-    for i in range(50):
-        execution_time = base_time - timedelta(hours=i*0.5)
-        procedure = random.choice(procedures)
-        status = random.choices(['SUCCESS', 'FAILED', 'WARNING'], weights=[85, 8, 7])[0]
-
-        executions.append({
-            'id': i + 1,
-            'procedure_name': procedure,
-            'execution_time': execution_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'status': status,
-            'duration_seconds': random.randint(30, 600),
-            'records_processed': random.randint(1000, 50000),
-            'records_inserted': random.randint(0, 5000),
-            'records_updated': random.randint(0, 3000),
-            'records_deleted': random.randint(0, 500),
-            'integration_log_id': f'LOG_{i+1000}'
-        })
-
-    return executions
+def generate_mock_execution_data(limit=None):
+    """Most recent mock reconciliation executions, newest first"""
+    return execution_store.mock_store().rows(limit=limit)
 
 def generate_mock_errors():
     """Generate mock error data"""
@@ -204,6 +199,24 @@ def generate_mock_errors():
 
     return sorted(errors, key=lambda x: x['error_timestamp'], reverse=True)
 
+def generate_mock_discrepancies(day):
+    """Generate a mock discrepancy cube for one day"""
+    rng = random.Random(day)
+    products = ['Alfa Classic', 'Alfa Active', 'Alfa Data Card', 'Mobile Broadband Postpaid',
+                'Mobile Broadband Prepaid', 'Twin Card']
+
+    cube = []
+    for parameter, hlr, mismatch_type, _ in discrepancy_cube.cube_cells():
+        for product in rng.sample(products, 2):
+            cube.append({
+                'parameter': parameter,
+                'hlr': hlr,
+                'product': product,
+                'mismatch_type': mismatch_type,
+                'subscribers': rng.randint(0, 400)
+            })
+    return cube
+
 def generate_system_metrics():
     """Generate system-wide metrics"""
     # Try real database first
@@ -211,77 +224,86 @@ def generate_system_metrics():
     if real_metrics:
         return real_metrics
 
-    # Fallback to mock data
-    executions = generate_mock_execution_data()
-
-    total_executions = len(executions)
-    successful = len([e for e in executions if e['status'] == 'SUCCESS'])
-    failed = len([e for e in executions if e['status'] == 'FAILED'])
-    warnings = len([e for e in executions if e['status'] == 'WARNING'])
-
-    avg_duration = sum(e['duration_seconds'] for e in executions) / len(executions)
-    total_records = sum(e['records_processed'] for e in executions)
+    # Fallback to mock data (same 7-day window as the replica)
+    store = execution_store.mock_store()
+    summary = store.summary(store.select(start=datetime.now() - timedelta(days=7)))
+    total_executions = summary['total'] or 1
 
     return {
-        'total_executions': total_executions,
-        'successful_executions': successful,
-        'failed_executions': failed,
-        'warning_executions': warnings,
-        'success_rate': round((successful / total_executions) * 100, 2),
-        'average_duration_seconds': round(avg_duration, 2),
-        'total_records_processed': total_records,
-        'last_execution_time': executions[0]['execution_time'],
+        'total_executions': summary['total'],
+        'successful_executions': summary['SUCCESS'],
+        'failed_executions': summary['FAILED'],
+        'warning_executions': summary['WARNING'],
+        'success_rate': round((summary['SUCCESS'] / total_executions) * 100, 2),
+        'average_duration_seconds': round(summary['avg_duration'], 2),
+        'total_records_processed': summary['total_records'],
+        'last_execution_time': summary['last_time'],
         'active_errors': len([e for e in generate_mock_errors() if not e['resolved']])
     }
 
-def generate_procedure_performance():
-    """Generate per-procedure performance metrics"""
-    procedures = [
-        'P1_MAIN_SYS_INTERFACES',
-        'P2_POST_PREP_SERV_INTERFACES',
-        'P3_PREP_INTERFACES',
-        'P4_CP_INTERFACES',
-        'P5_ALFA_CP_INTERFACES',
-        'P6_VOLTE_INTERFACES',
-        'P7_DATACARD_INTERFACES'
-    ]
+def generate_procedure_performance(days=30):
+    """Generate per-procedure performance metrics with duration percentiles"""
+    if local_replica and sketch_store and local_replica.is_populated():
+        end = datetime.now()
+        start = end - timedelta(days=days)
+        performance = local_replica.fetch_procedure_performance(days)
+        for proc in performance:
+            name = proc['procedure_name']
+            proc.update(sketches.percentile_fields(
+                sketch_store.merged(name, 'duration', start, end),
+                sketch_store.merged(name, 'records_per_second', start, end)
+            ))
+        return sorted(performance, key=lambda x: x['success_rate'])
+
+    store = execution_store.mock_store()
+    rows = store.select(start=datetime.now() - timedelta(days=days))
 
     performance = []
-    for proc in procedures:
-        total_runs = random.randint(50, 150)
-        successful = random.randint(int(total_runs * 0.85), total_runs)
-
+    for proc in store.by_procedure(rows, quantiles=(0.1, 0.5, 0.9, 0.99)):
+        _, p50, p90, p99 = proc['duration_quantiles']
+        rate_p10, rate_p50, rate_p90, rate_p99 = proc['throughput_quantiles']
         performance.append({
-            'procedure_name': proc,
-            'total_runs': total_runs,
-            'successful_runs': successful,
-            'failed_runs': total_runs - successful,
-            'success_rate': round((successful / total_runs) * 100, 2),
-            'avg_duration_seconds': random.randint(60, 500),
-            'last_run_time': (datetime.now() - timedelta(hours=random.randint(1, 24))).strftime('%Y-%m-%d %H:%M:%S')
+            'procedure_name': proc['procedure_name'],
+            'total_runs': proc['total_runs'],
+            'successful_runs': proc['successful_runs'],
+            'failed_runs': proc['failed_runs'],
+            'success_rate': round((proc['successful_runs'] / proc['total_runs']) * 100, 2),
+            'avg_duration_seconds': round(proc['avg_duration']),
+            'last_run_time': proc['last_run_time'],
+            'p50_duration_seconds': round(p50, 1),
+            'p90_duration_seconds': round(p90, 1),
+            'p99_duration_seconds': round(p99, 1),
+            'p50_records_per_second': round(rate_p50, 1),
+            'p90_records_per_second': round(rate_p90, 1),
+            'p99_records_per_second': round(rate_p99, 1),
+            'p10_records_per_second': round(rate_p10, 1)
         })
 
     return sorted(performance, key=lambda x: x['success_rate'])
 
-def generate_hourly_stats():
-    """Generate hourly execution statistics for charts"""
-    hours = []
-    base_time = datetime.now()
+def generate_hourly_stats(hours=24, width=config.CHART_MAX_POINTS):
+    """Generate execution statistics for charts over the last `hours`"""
+    end = datetime.now()
+    start = end - timedelta(hours=hours)
 
-    for i in range(24, 0, -1):
-        hour_time = base_time - timedelta(hours=i)
-        total_exec = random.randint(10, 35)
-        successful = random.randint(int(total_exec * 0.85), total_exec)
-
-        hours.append({
-            'hour': hour_time.strftime('%H:00'),
-            'executions': total_exec,
-            'successful': successful,
-            'failed': total_exec - successful,
-            'avg_duration': random.randint(120, 400)
-        })
+    if rollup_store and rollup_store.is_populated():
+        return rollup_store.query(start, end, width)
 
-    return hours
+    store = execution_store.mock_store()
+    start = end.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+    executions, successful, failed, avg_duration = store.by_interval(
+        store.select(start=start), start, 3600, hours)
+
+    label = '%H:00' if hours <= 24 else '%m-%d %H:00'
+    stats = [{
+        'hour': (start + timedelta(hours=i)).strftime(label),
+        'executions': int(executions[i]),
+        'successful': int(successful[i]),
+        'failed': int(failed[i]),
+        'avg_duration': round(avg_duration[i])
+    } for i in range(hours)]
+
+    return rollups.lttb(stats, width, 'executions')
 
 # Routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -344,15 +366,27 @@ def get_metrics():
 def get_executions():
     """Get recent reconciliation executions"""
     limit = request.args.get('limit', default=20, type=int)
-    executions = generate_mock_execution_data()[:limit]
+    if local_replica and local_replica.is_populated():
+        return jsonify(local_replica.fetch_executions(limit))
+    executions = generate_mock_execution_data(limit)
     return jsonify(executions)
 
 @app.route('/api/errors')
 @login_required
 @audit_log('API_ERRORS')
 def get_errors():
-    """Get recent errors"""
+    """Get recent errors, or fingerprint groups with ?grouped=1 / ?q=search"""
     limit = request.args.get('limit', default=10, type=int)
+    q = request.args.get('q')
+    if q or request.args.get('grouped', default=0, type=int):
+        if error_groups and local_replica.is_populated():
+            return jsonify(error_groups.fetch_groups(limit, q))
+        return jsonify(error_index.group_errors(generate_mock_errors(), q)[:limit])
+
+    if local_replica and local_replica.is_populated():
+        errors = local_replica.fetch_errors(limit) + regression_detector.fetch_error_feed(limit)
+        errors.sort(key=lambda x: x['error_timestamp'], reverse=True)
+        return jsonify(errors[:limit])
     errors = generate_mock_errors()[:limit]
     return jsonify(errors)
 
@@ -360,15 +394,160 @@ def get_errors():
 @login_required
 @audit_log('API_PROCEDURE_PERFORMANCE')
 def get_procedure_performance():
-    """Get performance metrics by procedure"""
-    return jsonify(generate_procedure_performance())
+    """Get performance metrics by procedure over the last N days (default 30)"""
+    days = request.args.get('days', default=30, type=int)
+    # Daily sketches are only kept for SKETCH_RETENTION_DAYS
+    return jsonify(generate_procedure_performance(min(max(days, 1), config.SKETCH_RETENTION_DAYS)))
 
 @app.route('/api/hourly-stats')
 @login_required
 @audit_log('API_HOURLY_STATS')
 def get_hourly_stats():
-    """Get hourly execution statistics"""
-    return jsonify(generate_hourly_stats())
+    """Get execution statistics for the last N hours (default 24)"""
+    hours = request.args.get('hours', default=24, type=int)
+    width = request.args.get('width', default=config.CHART_MAX_POINTS, type=int)
+    # Nothing older than the longest rollup tier is kept
+    hours = min(max(hours, 1), max(config.ROLLUP_RETENTION_DAYS.values()) * 24)
+    width = min(max(width, 3), config.CHART_MAX_POINTS)
+    return jsonify(generate_hourly_stats(hours, width))
+
+@app.route('/api/regressions')
+@login_required
+@audit_log('API_REGRESSIONS')
+def get_regressions():
+    """Get detected performance change points, newest first"""
+    if not regression_detector:
+        return jsonify([])
+    limit = request.args.get('limit', default=50, type=int)
+    procedure = request.args.get('procedure')
+    return jsonify(regression_detector.fetch_events(limit, procedure))
+
+@app.route('/api/replica-status')
+@login_required
+def get_replica_status():
+    """Get local replica freshness"""
+    if not local_replica:
+        return jsonify({'enabled': False})
+    return jsonify(dict(local_replica.status(), enabled=True))
+
+@app.route('/api/discrepancies')
+@login_required
+@audit_log('API_DISCREPANCIES')
+def get_discrepancies():
+    """Slice the discrepancy cube of a day (default latest) vs the previous day
+
+    ?group_by=parameter,hlr&parameter=SCHAR&hlr=1&product=...&mismatch_type=MISSING&day=YYYY-MM-DD
+    """
+    group_by = [d for d in request.args.get('group_by', 'parameter').split(',') if d]
+    if not group_by or any(d not in discrepancy_cube.DIMENSIONS for d in group_by):
+        return jsonify({'error': f"group_by must use {', '.join(discrepancy_cube.DIMENSIONS)}"}), 400
+    filters = {d: request.args[d] for d in discrepancy_cube.DIMENSIONS if request.args.get(d)}
+    day = request.args.get('day')
+    if day:
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'day must be YYYY-MM-DD'}), 400
+
+    if discrepancies and discrepancies.days():
+        return jsonify(discrepancies.slice(day, group_by, filters))
+
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    previous_day = (datetime.strptime(day, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+    rows = [r for r in generate_mock_discrepancies(day) if discrepancy_cube.matches(r, filters)]
+    previous_rows = [r for r in generate_mock_discrepancies(previous_day) if discrepancy_cube.matches(r, filters)]
+    return jsonify({
+        'day': day,
+        'previous_day': previous_day,
+        'group_by': group_by,
+        'rows': discrepancy_cube.summarize(rows, previous_rows, group_by)
+    })
+
+@app.route('/api/discrepancies/days')
+@login_required
+def get_discrepancy_days():
+    """Get the days that have a discrepancy cube, newest first"""
+    if discrepancies and discrepancies.days():
+        return jsonify(discrepancies.days())
+    return jsonify([(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)])
+
+def job_role_required(f):
+    """Only roles in config.JOB_ALLOWED_ROLES may start or cancel jobs"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if current_user.role not in config.JOB_ALLOWED_ROLES:
+            return jsonify({'error': 'not allowed to run jobs'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.route('/api/jobs/catalog')
+@login_required
+def get_job_catalog():
+    """Get the interfaces and PROV_RECON_* steps that can be run on demand"""
+    return jsonify([item for item in jobs.catalog()
+                    if item['kind'] != 'step' or current_user.role in config.JOB_STEP_ROLES])
+
+@app.route('/api/jobs', methods=['GET'])
+@login_required
+@audit_log('API_JOBS')
+def get_jobs():
+    """Get queued, running and recently finished jobs"""
+    return jsonify(job_runner.list())
+
+@app.route('/api/jobs', methods=['POST'])
+@login_required
+@job_role_required
+@audit_log('API_JOB_SUBMIT')
+def submit_job():
+    """Enqueue a procedure: {"procedure": "...", "params": {...}}"""
+    payload = request.get_json(silent=True) or {}
+    if str(payload.get('procedure') or '').upper() in jobs.STEPS and current_user.role not in config.JOB_STEP_ROLES:
+        return jsonify({'error': 'PROV_RECON_* steps issue DDL and are restricted to administrators'}), 403
+    try:
+        job = job_runner.submit(payload.get('procedure'), payload.get('params'), current_user.username)
+    except jobs.JobError as e:
+        return jsonify({'error': str(e)}), 400
+    print(f"🚀 [JOB] {job.job_id} {job.procedure} {job.params} queued by {current_user.username}")
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def get_job(job_id):
+    """Get one job with its progress"""
+    job = job_runner.get(job_id)
+    if not job:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+@job_role_required
+@audit_log('API_JOB_CANCEL')
+def cancel_job(job_id):
+    """Cancel a job that has not started yet"""
+    if not job_runner.cancel(job_id):
+        return jsonify({'error': 'only queued jobs can be cancelled'}), 409
+    return jsonify(job_runner.get(job_id))
+
+@app.route('/api/jobs/<job_id>/stream')
+@login_required
+def stream_job(job_id):
+    """Server-sent events with job progress until the job finishes"""
+    if not job_runner.get(job_id):
+        return jsonify({'error': 'job not found'}), 404
+
+    def events():
+        while True:
+            job = job_runner.get(job_id)
+            if not job:
+                break
+            yield f"data: {json.dumps(job)}\n\n"
+            if job['status'] not in (jobs.QUEUED, jobs.RUNNING):
+                break
+            time.sleep(2)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/user-info')
 @login_required
@@ -389,6 +568,7 @@ def health_check():
         'timestamp': datetime.now().isoformat(),
         'version': '2.0.0',
         'database_connected': config.USE_REAL_DATABASE and ORACLE_AVAILABLE,
+        'replica_fresh': local_replica.status()['fresh'] if local_replica else None,
         'authenticated': current_user.is_authenticated
     })
 
@@ -405,6 +585,10 @@ if __name__ == '__main__':
     print("=" * 70)
     print("⚠️  SECURITY WARNING: Change default passwords in config.py!")
     print("=" * 70)
+    if local_replica and ORACLE_AVAILABLE and config.USE_REAL_DATABASE:
+        replica.start_sync_agent(local_replica, get_oracle_connection, config.REPLICA_SYNC_INTERVAL_SECONDS)
+        print(f"🔁 Replica sync agent running every {config.REPLICA_SYNC_INTERVAL_SECONDS}s → {config.REPLICA_DB_PATH}")
+        print("=" * 70)
     print("✨ Server ready! Navigate to the URL above and log in.")
     print("=" * 70)
 
@@ -48,3 +48,84 @@ USE_REAL_DATABASE = False  # Set to True when database is configured
 ENABLE_EMAIL_ALERTS = False
 ENABLE_EXPORT_REPORTS = True
 ENABLE_USER_AUDIT_LOG = True
+ENABLE_LOCAL_REPLICA = False  # Serve dashboard reads from a local SQLite replica
+
+# Local Read Replica
+# The sync agent tails the reconciliation log tables into this file so
+# operator traffic never reaches the production database
+REPLICA_DB_PATH = 'dashboard_replica.db'
+REPLICA_SYNC_INTERVAL_SECONDS = 30
+REPLICA_MAX_LAG_SECONDS = 120  # Replica is reported stale beyond this lag
+
+# Time-Series Rollups (stored in the replica file)
+ROLLUP_RETENTION_DAYS = {
+    '1m': 2,      # 1-minute buckets
+    '1h': 90,     # 1-hour buckets
+    '1d': 1825,   # 1-day buckets
+}
+CHART_MAX_POINTS = 200  # Default chart width for /api/hourly-stats
+
+# Percentile Sketches (stored in the replica file)
+SKETCH_RETENTION_DAYS = 365  # Daily sketches kept; caps /api/procedure-performance?days
+
+# Performance Regression Detection (EWMA baseline + CUSUM)
+REGRESSION_EWMA_ALPHA = 0.05       # Baseline adaptation rate per run
+REGRESSION_CUSUM_SLACK = 0.5       # Drift (in std devs) tolerated per run
+REGRESSION_CUSUM_THRESHOLD = 5.0   # Alarm when cumulative drift exceeds this
+REGRESSION_WARMUP_RUNS = 10        # Runs needed before a baseline is trusted
+
+# Dump Gate (run before P1_MAIN_SYS_INTERFACES: python3 dump_gate.py)
+DUMP_GATE = {
+    'dumps': {
+        'HLR1': {'path': '/data/dumps/HLR1_*.csv', 'required_columns': ['NUM_APPEL', 'IMSI']},
+        'HLR2': {'path': '/data/dumps/HLR2_*.csv', 'required_columns': ['NUM_APPEL', 'IMSI']},
+        'CLEAN_SV_ALL_UPD': {'path': '/data/dumps/SV_*.csv'},
+        'PPS_ABONNE_JOUR_MIGDB': {'path': '/data/dumps/MINSAT_*.csv'},
+    },
+    'db_tables': ['HLR1', 'HLR2', 'CLEAN_SV_ALL_UPD', 'PPS_ABONNE_JOUR_MIGDB'],
+    'baseline_path': 'dump_baselines.json',
+    'max_age_hours': 20,        # Older dumps defer the run
+    'baseline_window': 7,       # Rolling baseline over the last N good runs
+    'min_baseline_runs': 3,
+    'min_size_ratio': 0.9,      # Below 90% of baseline blocks the run
+    'max_size_ratio': 1.5,      # Above 150% only warns
+    'sample_chunks': 16,        # Blocks hashed for the sampled checksum
+    'chunk_size': 65536,
+}
+
+# Columnar Staging (requires pyarrow: pip3 install pyarrow)
+STAGING_ROOT = '/data/staging'
+STAGING_RETENTION_DAYS = 3
+
+# On-Demand Jobs (/api/jobs; requires USE_REAL_DATABASE)
+JOB_ALLOWED_ROLES = ['administrator', 'operator']
+JOB_STEP_ROLES = ['administrator']      # PROV_RECON_* steps run CREATE TABLE DDL
+JOB_SCHEMA_ALLOWLIST = ['FAFIF']        # Accepted SCHEMA_OWNER values
+JOB_MAX_CONCURRENT = 2          # Dashboard jobs running at once
+JOB_CONCURRENCY_LIMITS = {      # Per-procedure limits ('default' for the rest)
+    'default': 1,
+}
+JOB_HEAVY_PROCEDURES = ['P1_MAIN_SYS_INTERFACES', 'P1_HLR_RECON_MONTH_INTERFACES']  # Run alone
+JOB_NIGHTLY_WINDOW_HOURS = (22, 6)  # Jobs wait while the nightly batch runs
+
+# Discrepancy Cube (rebuilt from REP_CLEAN_ALL_MERGED when these succeed)
+DISCREPANCY_CUBE_TRIGGERS = ['P4_CP_INTERFACES', 'P_IA_CP_INTERFACES']
+
+# Output File Transfer (replaces UTL_FILE.FCOPY + DBAUSER.P_FTP: python3 transfer.py)
+TRANSFER = {
+    'source_dir': '/u01/app/oracle/output',     # Path of the Oracle OUTPUT directory
+    'patterns': ['reconciliation_*.csv', '*.csv'],
+    'transport': {
+        'type': 'ftp',                           # 'ftp' or 'local' (with 'path')
+        'host': '192.168.41.13',
+        'username': 'ftp_prov',
+        'password': 'change-me',                 # ⚠️ UPDATE THIS
+        'remote_dir': '.',
+        'compression_level': 0,                  # gzip level per destination; 0 sends files as they are
+    },
+    'remote_name': '{stem}.txt',    # {name}, {stem}, {ext}; P_FTP delivered reconciliation_<date>.txt
+    'streams': 4,                   # Parallel connections per file
+    'chunk_size': 8 * 1024 * 1024,  # Raw bytes per chunk (unit of resume and checksum)
+    'retries': 3,                   # Attempts per chunk
+    'state_dir': 'transfer_state',
+}
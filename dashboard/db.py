@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Oracle Connection Helper
+Shared by the dashboard and the standalone agents (replica, dump gate,
+staging, discrepancy cube) so none of them has to import the Flask app
+"""
+
+import config
+
+# Try to import Oracle connector
+try:
+    import cx_Oracle
+    ORACLE_AVAILABLE = True
+except ImportError:
+    ORACLE_AVAILABLE = False
+    print("⚠️  cx_Oracle not available. Using mock data.")
+
+
+def get_oracle_connection():
+    """Get Oracle database connection"""
+    if not ORACLE_AVAILABLE or not config.USE_REAL_DATABASE:
+        return None
+
+    try:
+        dsn = cx_Oracle.makedsn(
+            config.ORACLE_CONFIG['host'],
+            config.ORACLE_CONFIG['port'],
+            service_name=config.ORACLE_CONFIG['service_name']
+        )
+        connection = cx_Oracle.connect(
+            config.ORACLE_CONFIG['username'],
+            config.ORACLE_CONFIG['password'],
+            dsn
+        )
+        return connection
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        return None
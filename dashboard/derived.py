@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Derived-Store Watermarks
+Every store computed from the replica tables (rollups, sketches, regression
+state, error groups, cube refresh) remembers the last execution_id or
+error_id it folded in. The watermark is written in the same SQLite
+transaction as the store's own rows, so a store catches up from the replica
+after a restart or a crash and never counts a row twice.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS derived_state (
+    store TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Key of the replica row dicts each source yields
+SOURCE_KEYS = {
+    'executions': 'id',
+    'errors': 'error_id',
+}
+
+
+def watermark(db, store):
+    """Last folded id, None when the store has never recorded a watermark"""
+    row = db.execute('SELECT last_id FROM derived_state WHERE store = ?', (store,)).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(db, store, last_id):
+    db.execute("""
+        INSERT INTO derived_state (store, last_id) VALUES (?, ?)
+        ON CONFLICT(store) DO UPDATE SET last_id = excluded.last_id
+    """, (store, last_id))
+
+
+def begin(db, store, source, rows):
+    """Open a write transaction; returns the rows above the store's watermark
+
+    The watermark moves to the newest returned row and is committed together
+    with whatever the caller writes before db.commit()
+    """
+    key = SOURCE_KEYS[source]
+    db.execute('BEGIN IMMEDIATE')
+    last_id = watermark(db, store) or 0
+    fresh = [row for row in rows if row.get(key) is not None and row[key] > last_id]
+    if fresh:
+        set_watermark(db, store, max(row[key] for row in fresh))
+    return fresh
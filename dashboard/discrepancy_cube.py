@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Per-Parameter Discrepancy Cube
+Counts HLR parameter mismatches (SCHAR, BS3G, CSP, OCSIST, RSA, TS11) by
+parameter x HLR x product x mismatch type, once per run date, from a single
+scan of REP_CLEAN_ALL_MERGED using the same predicates as the REP_* tables
+that feed PROV_RECON_*_PARAM
+
+    python3 discrepancy_cube.py          # build today's cube
+"""
+
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import derived
+
+DIMENSIONS = ['parameter', 'hlr', 'product', 'mismatch_type']
+MISSING, WRONG_VALUE, UNEXPECTED = 'MISSING', 'WRONG_VALUE', 'UNEXPECTED'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS discrepancy_cube (
+    day TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    hlr TEXT NOT NULL,
+    product TEXT NOT NULL,
+    mismatch_type TEXT NOT NULL,
+    subscribers INTEGER NOT NULL,
+    PRIMARY KEY (day, parameter, hlr, product, mismatch_type)
+) WITHOUT ROWID;
+"""
+
+# Segments of P_IA_CP_INTERFACES / P4_CP_INTERFACES; {n} is the HLR number
+POSTPAID = ("T.SERVICE_STATUS = 'Active'"
+            " AND T.SERVICE_TYPE_NAME IN ('Voice', 'Data Card', 'Postpaid Broadband')"
+            " AND T.PRODUCT_TYPE_NAME IN ('Alfa Classic', 'Alfa Data Card', 'Mobile Broadband Postpaid')"
+            " AND X.EXCL_PREPAID IS NULL")
+PREPAID = ("T.SERVICE_STATUS = 'Active'"
+           " AND T.SERVICE_TYPE_NAME IN ('Prepaid', 'Prepaid Broadband')"
+           " AND T.PRODUCT_TYPE_NAME IN ('Alfa Active', 'Mobile Broadband Prepaid')"
+           " AND M.SERVICE_NAME IS NULL AND X.EXCL_PREPAID IS NULL")
+TWIN = "T.SERVICE_STATUS = 'Active' AND T.SERVICE_TYPE_NAME = 'Twin Card' AND X.EXCL_PREPAID IS NULL"
+PREPAID_CSP = ("T.SERVICE_TYPE_NAME = 'Prepaid' AND T.SERVICE_STATUS NOT IN ('Cancelled', 'Moved')"
+               " AND T.VOLTE01_APN1 IS NULL AND T.MSISDN_HLRS IS NOT NULL")
+SDP01 = "T.SDP IN ('SDP03', 'SDP05')"
+SDP02 = "T.SDP IN ('SDP04', 'SDP06')"
+
+
+def _schar(segment, expected):
+    return [(MISSING, f"{segment} AND T.SCHAR_{{n}} IS NULL"),
+            (WRONG_VALUE, f"{segment} AND T.SCHAR_{{n}} <> '{expected}'")]
+
+
+# parameter -> [(mismatch type, condition)]; each rule names the procedure
+# and the REP_* tables ({n} = 1, 2) whose predicate it reproduces
+RULES = {
+    # P_IA_CP_INTERFACES: REP_POST_SDP01_SCHAR_NO_HLR{n}, REP_POST_SDP02_SCHAR_NO_HLR{n},
+    # REP_PREP_SDP01_SCHAR_NO_HLR{n}, REP_PREP_SDP02_SCHAR_NO_HLR{n},
+    # REP_POST_TWIN_SCHAR_NO_HLR{n} -> PROV_RECON_SCHAR_PARAM
+    'SCHAR': (_schar(f'{POSTPAID} AND {SDP01}', 6) + _schar(f'{POSTPAID} AND {SDP02}', 10)
+              + _schar(f'{PREPAID} AND {SDP01}', 4) + _schar(f'{PREPAID} AND {SDP02}', 8)
+              + _schar(TWIN, 0)),
+    'RSA': [
+        # P_IA_CP_INTERFACES: REP_PREP_RSA_INC_HLR{n} -> PROV_RECON_RSA_PARAM
+        (WRONG_VALUE, "T.PRODUCT_TYPE_NAME = 'Alfa Active' AND T.OICK_{n} = '100'"
+                      " AND T.RSA_{n} NOT IN ('6', '7', '8', '9') AND XR.EXCL_ROAMING IS NULL"),
+    ],
+    'CSP': [
+        # P_IA_CP_INTERFACES: REP_PREP_SDP01_INC_CSP_HLR{n} -> PROV_RECON_CSP_PARAM
+        (WRONG_VALUE, f"{PREPAID_CSP} AND {SDP01} AND T.CAMEL_{{n}} NOT IN (1, 3)"),
+        # P_IA_CP_INTERFACES: REP_PREP_SDP02_INC_CSP_HLR{n} -> PROV_RECON_CSP_PARAM
+        (WRONG_VALUE, f"{PREPAID_CSP} AND {SDP02} AND T.CAMEL_{{n}} NOT IN (2, 3)"),
+    ],
+    'OCSIST': [
+        # P_IA_CP_INTERFACES: the OCSIST_{n} <> 1 half of REP_PREP_SDP01_INC_CSP_HLR{n}
+        # and REP_PREP_SDP02_INC_CSP_HLR{n} -> PROV_RECON_CSP_PARAM
+        (WRONG_VALUE, f"{PREPAID_CSP} AND ({SDP01} OR {SDP02}) AND T.OCSIST_{{n}} <> 1"),
+    ],
+    'TS11': [
+        # P4_CP_INTERFACES: REP_MBB_SV_VOICE_HLR{n} -> PROV_RECON_TS11_PARAM
+        (UNEXPECTED, "T.PRODUCT_TYPE_NAME IN ('Mobile Broadband Postpaid', 'Mobile Broadband Prepaid')"
+                     " AND T.TS11_{n} IS NOT NULL"),
+    ],
+    'BS3G': [
+        # P4_CP_INTERFACES: REP_VCALL_SV_NO_HLR{n}, video call active on SV, not on the HLR
+        (MISSING, "T.SERVICE_TYPE_NAME = 'Voice' AND V.ACTIVE = 1"
+                  " AND T.MSISDN_HLRS IS NOT NULL AND T.BS3G_{n} IS NULL"),
+        # P4_CP_INTERFACES: REP_VCALL_HLR_NOT_SV{n}, video call on the HLR without the SV product
+        (UNEXPECTED, "T.SERVICE_TYPE_NAME = 'Voice' AND T.SERVICE_STATUS <> 'Cancelled'"
+                     " AND T.PROD_STATUS = 3 AND T.BS3G_{n} = 1 AND V.MSISDN IS NULL"),
+    ],
+}
+HLRS = ('1', '2')
+
+CUBE_SOURCE = """
+    WITH EXCL AS (
+        SELECT MSISDN,
+               MAX(CASE WHEN REASON IN ('PREPAID', 'ALL') THEN 1 END) AS EXCL_PREPAID,
+               MAX(CASE WHEN REASON IN ('ROAMING', 'ALL') THEN 1 END) AS EXCL_ROAMING
+        FROM MSISDNS_EXCLUDED_FROM_RECON
+        GROUP BY MSISDN
+    ), VCALL AS (
+        SELECT MSISDN, MAX(CASE WHEN CP_STATUS = 'Active' THEN 1 ELSE 0 END) AS ACTIVE
+        FROM MAIN_VIDEOCALL_SYS
+        GROUP BY MSISDN
+    ), MISP AS (
+        SELECT DISTINCT SERVICE_NAME FROM REP_SV_MSISDN_IN_MISP
+    )
+    SELECT NVL(T.PRODUCT_TYPE_NAME, 'UNKNOWN') AS PRODUCT, {measures}
+    FROM REP_CLEAN_ALL_MERGED T
+    LEFT JOIN EXCL X ON X.MSISDN = T.MSISDN_SYS
+    LEFT JOIN EXCL XR ON XR.MSISDN = T.MSISDN
+    LEFT JOIN VCALL V ON V.MSISDN = T.MSISDN
+    LEFT JOIN MISP M ON M.SERVICE_NAME = T.MSISDN_SYS
+    GROUP BY NVL(T.PRODUCT_TYPE_NAME, 'UNKNOWN')
+"""
+
+
+def cube_cells():
+    """(parameter, hlr, mismatch type, SQL condition) for every measure column"""
+    cells = []
+    for parameter, checks in RULES.items():
+        for mismatch_type in dict.fromkeys(t for t, _ in checks):
+            condition = ' OR '.join(f'({c})' for t, c in checks if t == mismatch_type)
+            for hlr in HLRS:
+                cells.append((parameter, hlr, mismatch_type, condition.replace('{n}', hlr)))
+    return cells
+
+
+def cube_query():
+    # Segments of one parameter are OR-ed so a subscriber is counted once per cell
+    measures = ',\n           '.join(
+        f'SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) AS C{i}'
+        for i, (_, _, _, condition) in enumerate(cube_cells())
+    )
+    return CUBE_SOURCE.format(measures=measures)
+
+
+def compute_cube(connection):
+    """Scan REP_CLEAN_ALL_MERGED once; returns non-empty cube rows"""
+    cells = cube_cells()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(cube_query())
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    cube = []
+    for product, *counts in rows:
+        for (parameter, hlr, mismatch_type, _), count in zip(cells, counts):
+            if count:
+                cube.append({'parameter': parameter, 'hlr': hlr, 'product': product,
+                             'mismatch_type': mismatch_type, 'subscribers': int(count)})
+    return cube
+
+
+def summarize(rows, previous_rows, group_by):
+    """Roll cube rows up to `group_by` with the previous day alongside"""
+    def rollup(cube):
+        totals = {}
+        for row in cube:
+            key = tuple(row[d] for d in group_by)
+            totals[key] = totals.get(key, 0) + row['subscribers']
+        return totals
+
+    current = rollup(rows)
+    previous = rollup(previous_rows) if previous_rows is not None else {}
+    result = []
+    for key in sorted(set(current) | set(previous)):
+        now, before = current.get(key, 0), previous.get(key)
+        entry = dict(zip(group_by, key), subscribers=now)
+        if previous_rows is not None:
+            entry['previous'] = before or 0
+            entry['change'] = now - (before or 0)
+        result.append(entry)
+    return sorted(result, key=lambda x: x['subscribers'], reverse=True)
+
+
+def matches(row, filters):
+    return all(row[d] == v for d, v in filters.items())
+
+
+class DiscrepancyCube:
+    """Daily cubes stored next to the replica"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def store(self, day, cube):
+        """Replace the cube for `day` (a rerun overwrites the earlier result)"""
+        with self._lock:
+            db = self._connect()
+            try:
+                db.execute('DELETE FROM discrepancy_cube WHERE day = ?', (day,))
+                db.executemany(
+                    'INSERT INTO discrepancy_cube VALUES (?, ?, ?, ?, ?, ?)',
+                    [(day, r['parameter'], r['hlr'], r['product'], r['mismatch_type'], r['subscribers'])
+                     for r in cube]
+                )
+                db.commit()
+            finally:
+                db.close()
+
+    def days(self):
+        db = self._connect()
+        try:
+            return [row[0] for row in db.execute(
+                'SELECT DISTINCT day FROM discrepancy_cube ORDER BY day DESC')]
+        finally:
+            db.close()
+
+    def fetch(self, day, filters=None):
+        filters = filters or {}
+        where = ' AND '.join(['day = ?'] + [f'{d} = ?' for d in filters])
+        db = self._connect()
+        try:
+            return [dict(row) for row in db.execute(
+                f'SELECT * FROM discrepancy_cube WHERE {where}', [day] + list(filters.values()))]
+        finally:
+            db.close()
+
+    def slice(self, day=None, group_by=('parameter',), filters=None):
+        """Cube for `day` (latest by default) rolled up, vs the previous stored day"""
+        days = self.days()
+        day = day or (days[0] if days else None)
+        earlier = [d for d in days if d < (day or '')]
+        previous_day = earlier[0] if earlier else None
+        rows = self.fetch(day, filters) if day else []
+        previous_rows = self.fetch(previous_day, filters) if previous_day else None
+        return {
+            'day': day,
+            'previous_day': previous_day,
+            'group_by': list(group_by),
+            'rows': summarize(rows, previous_rows, list(group_by)),
+        }
+
+
+def build_cube(connection, store, day=None):
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    cube = compute_cube(connection)
+    store.store(day, cube)
+    return day, cube
+
+
+class CubeRefresher:
+    """Rebuilds a run date's cube when a trigger procedure succeeds (fed from the replica)
+
+    The cube is keyed to the trigger run's own date, so a run synced after
+    midnight still lands on its day. Builds run one at a time on a single
+    worker thread. Trigger batches that arrive while a run date is already
+    queued add nothing, so a burst of successes costs one scan of
+    REP_CLEAN_ALL_MERGED, and one more if it lands while that scan is in
+    flight. REP_CLEAN_ALL_MERGED only holds the newest run's output, so a
+    queued date older than the newest trigger run is dropped, not built.
+    """
+
+    name = 'discrepancy_cube'
+    source = 'executions'
+
+    def __init__(self, cube, connect, triggers):
+        self.cube = cube
+        self.connect = connect
+        self.triggers = triggers
+        self._lock = threading.Lock()
+        self._pending = []
+        self._latest = None
+        self._worker = None
+        with cube._connect() as db:
+            db.executescript(derived.SCHEMA)
+
+    def record(self, executions):
+        db = self.cube._connect()
+        try:
+            executions = derived.begin(db, self.name, self.source, executions)
+            db.commit()
+        finally:
+            db.close()
+
+        days = {e['execution_time'][:10] for e in executions
+                if e['procedure_name'] in self.triggers and e['status'] == 'SUCCESS'}
+        if days:
+            self.request(max(days))
+
+    def request(self, day):
+        """Queue a build for `day` unless one is already waiting"""
+        with self._lock:
+            self._latest = max(self._latest or day, day)
+            if day not in self._pending:
+                self._pending.append(day)
+            if self._worker is None:
+                # Full scan of REP_CLEAN_ALL_MERGED: keep it off the sync thread
+                self._worker = threading.Thread(target=self._drain, name='discrepancy-cube', daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                day = self._pending.pop(0)
+                if day < self._latest:
+                    continue
+            self.build(day)
+
+    def build(self, day=None):
+        conn = self.connect()
+        if not conn:
+            return
+        try:
+            day, cube = build_cube(conn, self.cube, day)
+            print(f"🧊 [CUBE] {day}: {len(cube)} discrepancy cells")
+        except Exception as e:
+            print(f"❌ Discrepancy cube failed: {e}")
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    import config
+    from db import get_oracle_connection
+
+    conn = get_oracle_connection()
+    if not conn:
+        print("❌ No database connection (check USE_REAL_DATABASE in config.py)")
+        sys.exit(1)
+
+    started = datetime.now()
+    try:
+        day, cube = build_cube(conn, DiscrepancyCube(config.REPLICA_DB_PATH))
+    finally:
+        conn.close()
+    print(f"✅ Discrepancy cube {day}: {len(cube)} cells, "
+          f"{sum(r['subscribers'] for r in cube):,} mismatches "
+          f"({(datetime.now() - started).total_seconds():.1f}s)")
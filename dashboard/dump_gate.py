@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Dump Freshness & Completeness Gate
+Runs before P1_MAIN_SYS_INTERFACES and blocks or defers the run when an
+input dump is stale, short or malformed (Python successor of the
+commented-out P_CHECK_DUMPS_VALIDITY)
+
+    python3 dump_gate.py            # exit 0 = PASS, 2 = DEFER, 1 = BLOCK
+    python3 dump_gate.py --json
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import config
+
+PASS, WARN, DEFER, BLOCK = 'PASS', 'WARN', 'DEFER', 'BLOCK'
+SEVERITY = {PASS: 0, WARN: 1, DEFER: 2, BLOCK: 3}
+EXIT_CODES = {PASS: 0, WARN: 0, DEFER: 2, BLOCK: 1}
+
+# Same checks as P_CHECK_DUMPS_VALIDITY: at least one row stamped today
+DB_FRESHNESS_QUERIES = {
+    'PPS_ABONNE_JOUR_MIGDB': """
+        SELECT COUNT(*) FROM FAFIF.PPS_ABONNE_JOUR_MIGDB
+        WHERE JOUR = TRUNC(SYSDATE) AND ROWNUM < 2
+    """,
+    'CLEAN_SV_ALL_UPD': """
+        SELECT COUNT(*) FROM FAFIF.CLEAN_SV_ALL_UPD
+        WHERE LAST_RUN_DATE >= TRUNC(SYSDATE) AND LAST_RUN_DATE < TRUNC(SYSDATE) + 1
+          AND ROWNUM < 2
+    """,
+}
+
+TABLE_ESTIMATE_QUERY = """
+    SELECT num_rows FROM all_tables
+    WHERE owner = :owner AND table_name = :table_name
+"""
+
+
+def _check(name, status, message, **details):
+    return dict(details, check=name, status=status, message=message)
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(path, baselines):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(baselines, f, indent=2)
+    os.replace(tmp, path)
+
+
+def sampled_checksum(path, size, chunks, chunk_size):
+    """SHA-256 of `chunks` evenly spaced blocks plus the file size"""
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        step = max((size - chunk_size) // max(chunks - 1, 1), 1)
+        for i in range(chunks):
+            f.seek(min(i * step, max(size - chunk_size, 0)))
+            digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+def read_head_and_tail(path, size, chunk_size):
+    with open(path, 'rb') as f:
+        head = f.read(chunk_size)
+        f.seek(max(size - chunk_size, 0))
+        tail = f.read(chunk_size)
+    return head, tail
+
+
+def check_dump_file(name, spec, history, settings):
+    """Metadata, size/row estimate, sampled checksum and schema checks"""
+    results = []
+    matches = sorted(glob.glob(spec['path']), key=os.path.getmtime)
+    if not matches:
+        return [_check('exists', DEFER, f"no file matches {spec['path']}")], None
+    path = matches[-1]
+
+    stat = os.stat(path)
+    size = stat.st_size
+    modified = datetime.fromtimestamp(stat.st_mtime)
+    age_hours = (datetime.now() - modified).total_seconds() / 3600
+    if size == 0:
+        return [_check('size', BLOCK, f"{path} is empty", path=path)], None
+
+    max_age = spec.get('max_age_hours', settings['max_age_hours'])
+    if age_hours > max_age:
+        results.append(_check('freshness', DEFER,
+                              f"{os.path.basename(path)} last modified {modified:%Y-%m-%d %H:%M}",
+                              age_hours=round(age_hours, 1)))
+    else:
+        results.append(_check('freshness', PASS, f"modified {age_hours:.1f}h ago", age_hours=round(age_hours, 1)))
+
+    # Partial reads: header + first lines for schema, tail for truncation
+    head, tail = read_head_and_tail(path, size, settings['chunk_size'])
+    delimiter = spec.get('delimiter', ',')
+    lines = head.split(b'\n')
+    complete_lines = [l for l in lines[:-1] if l.strip()] if len(lines) > 1 else []
+    # csv.reader so quoted fields may contain the delimiter (or a newline)
+    sample = b'\n'.join(complete_lines[:201]).decode('utf-8', errors='replace')
+    rows = [r for r in itertools.islice(csv.reader(io.StringIO(sample), delimiter=delimiter), 201) if r]
+    header = rows[0] if rows else []
+
+    required = spec.get('required_columns')
+    if required:
+        columns = [c.strip().upper() for c in header]
+        missing = [c for c in required if c.upper() not in columns]
+        if missing:
+            results.append(_check('schema', BLOCK, f"missing columns {', '.join(missing)}"))
+        else:
+            results.append(_check('schema', PASS, f"{len(columns)} columns"))
+
+    if rows:
+        # When the sample stops mid-file its last row may be a cut quoted record
+        sampled = rows[:-1] if size > len(head) and len(rows) > 1 else rows
+        field_counts = {len(r) for r in sampled[:200]}
+        if len(field_counts) > 1:
+            results.append(_check('schema', BLOCK, f"inconsistent field counts in first lines: {sorted(field_counts)}"))
+
+    if not tail.endswith(b'\n'):
+        results.append(_check('truncation', BLOCK, 'file does not end with a newline (truncated transfer?)'))
+
+    # Row estimate from the average length of the sampled data lines
+    data_lines = complete_lines[1:] or complete_lines
+    avg_line = sum(len(l) + 1 for l in data_lines) / len(data_lines) if data_lines else 0
+    estimated_rows = int(size / avg_line) if avg_line else 0
+
+    past = history.get('runs', [])[-settings['baseline_window']:]
+    if len(past) >= settings['min_baseline_runs']:
+        baseline_size = statistics.median(r['size'] for r in past)
+        ratio = size / baseline_size if baseline_size else 1
+        status = BLOCK if ratio < settings['min_size_ratio'] else WARN if ratio > settings['max_size_ratio'] else PASS
+        results.append(_check('volume', status,
+                              f"{size:,} bytes, ~{estimated_rows:,} rows ({ratio:.0%} of baseline)",
+                              size=size, estimated_rows=estimated_rows, baseline_ratio=round(ratio, 3)))
+    else:
+        results.append(_check('volume', PASS, f"{size:,} bytes, ~{estimated_rows:,} rows (building baseline)",
+                              size=size, estimated_rows=estimated_rows))
+
+    checksum = sampled_checksum(path, size, settings['sample_chunks'], settings['chunk_size'])
+    if past and past[-1].get('checksum') == checksum:
+        results.append(_check('checksum', DEFER, 'identical to the previous run (dump not refreshed)'))
+    else:
+        results.append(_check('checksum', PASS, checksum[:12]))
+
+    observation = {
+        'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'path': path,
+        'size': size,
+        'estimated_rows': estimated_rows,
+        'checksum': checksum,
+    }
+    return results, observation
+
+
+def check_database(connection, history, settings):
+    """Run-date stamps and dictionary row estimates inside Oracle"""
+    results = []
+    cursor = connection.cursor()
+    try:
+        for table, query in DB_FRESHNESS_QUERIES.items():
+            cursor.execute(query)
+            if cursor.fetchone()[0]:
+                results.append(_check('db_freshness', PASS, 'rows stamped today', dump=table))
+            else:
+                results.append(_check('db_freshness', DEFER, 'no rows stamped today', dump=table))
+
+        # num_rows is as of the last stats gather, not today's load: this
+        # catches a table that shrank, freshness comes from the stamps above
+        for table in settings['db_tables']:
+            cursor.execute(TABLE_ESTIMATE_QUERY, owner='FAFIF', table_name=table)
+            row = cursor.fetchone()
+            num_rows = row[0] if row else None
+            if num_rows is None:
+                results.append(_check('db_volume', WARN, 'no optimizer stats', dump=table))
+                continue
+            past = [r['num_rows'] for r in history.get(f'db:{table}', {}).get('runs', [])]
+            past = past[-settings['baseline_window']:]
+            if len(past) >= settings['min_baseline_runs'] and statistics.median(past):
+                ratio = num_rows / statistics.median(past)
+                status = BLOCK if ratio < settings['min_size_ratio'] else PASS
+                results.append(_check('db_volume', status, f"~{num_rows:,} rows ({ratio:.0%} of baseline)",
+                                      dump=table, num_rows=num_rows))
+            else:
+                results.append(_check('db_volume', PASS, f"~{num_rows:,} rows (building baseline)",
+                                      dump=table, num_rows=num_rows))
+    finally:
+        cursor.close()
+    return results
+
+
+def run_gate(settings=None, connection=None):
+    """Evaluate every dump; returns (verdict, results, observations)"""
+    settings = settings or config.DUMP_GATE
+    baselines = load_baselines(settings['baseline_path'])
+    results = []
+    observations = {}
+
+    for name, spec in settings['dumps'].items():
+        checks, observation = check_dump_file(name, spec, baselines.get(name, {}), settings)
+        results.extend(dict(r, dump=name) for r in checks)
+        if observation:
+            observations[name] = observation
+
+    if connection:
+        db_results = check_database(connection, baselines, settings)
+        results.extend(db_results)
+        for r in db_results:
+            if 'num_rows' in r:
+                observations[f"db:{r['dump']}"] = {'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                                   'num_rows': r['num_rows']}
+
+    verdict = max((r['status'] for r in results), key=SEVERITY.get, default=PASS)
+
+    # Only clean inputs are allowed to move the baseline
+    if verdict in (PASS, WARN):
+        for name, observation in observations.items():
+            runs = baselines.setdefault(name, {}).setdefault('runs', [])
+            runs.append(observation)
+            del runs[:-settings['baseline_window'] * 4]
+        save_baselines(settings['baseline_path'], baselines)
+
+    return verdict, results, observations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate input dumps before a reconciliation run')
+    parser.add_argument('--json', action='store_true', help='print a machine-readable result')
+    parser.add_argument('--no-db', action='store_true', help='skip the in-database checks')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    connection = None
+    if not args.no_db and config.USE_REAL_DATABASE:
+        from db import get_oracle_connection
+        connection = get_oracle_connection()
+
+    try:
+        verdict, results, _ = run_gate(connection=connection)
+    finally:
+        if connection:
+            connection.close()
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({'verdict': verdict, 'elapsed_seconds': round(elapsed, 2), 'checks': results}, indent=2))
+    else:
+        icons = {PASS: '✅', WARN: '⚠️ ', DEFER: '⏸️ ', BLOCK: '❌'}
+        print("=" * 60)
+        print("🚦 Dump Gate")
+        print("=" * 60)
+        for r in results:
+            print(f"   {icons[r['status']]} {r.get('dump', '-')}: {r['check']} — {r['message']}")
+        print("=" * 60)
+        print(f"⏱️  {elapsed:.2f}s — verdict: {verdict}")
+        print("=" * 60)
+
+    sys.exit(EXIT_CODES[verdict])
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Error Fingerprinting and Search Index
+Groups RECONCILIATION_ERRORS by procedure, error code and normalized
+message template, with a small inverted index for message search
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+
+import derived
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS error_groups (
+    fingerprint TEXT PRIMARY KEY,
+    procedure_name TEXT NOT NULL,
+    error_code TEXT,
+    error_type TEXT,
+    template TEXT NOT NULL,
+    sample_message TEXT,
+    severity TEXT,
+    occurrences INTEGER NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_group_last_seen ON error_groups(last_seen);
+
+CREATE TABLE IF NOT EXISTS error_terms (
+    term TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (term, fingerprint)
+) WITHOUT ROWID;
+"""
+
+# Variable parts of a message, replaced in this order
+NORMALIZERS = [
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<hex>'),
+    (re.compile(r'\b\w*\d\w*\b'), '<num>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9_]{2,}')
+PLACEHOLDER_PATTERN = re.compile(r'<(?:str|hex|num)>')
+
+
+def normalize_message(message):
+    """Message template with literals, numbers and ids masked"""
+    template = message or ''
+    for pattern, replacement in NORMALIZERS:
+        template = pattern.sub(replacement, template)
+    return template.strip()
+
+
+def fingerprint(procedure_name, error_code, message):
+    key = f"{procedure_name}|{error_code or ''}|{normalize_message(message)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def tokenize(text):
+    return set(TOKEN_PATTERN.findall((text or '').lower()))
+
+
+def index_terms(procedure_name, error_code, message):
+    """Terms of a group: procedure, error code and the normalized template
+
+    Literals and ids are masked by the normalizers and left out, so the index
+    grows with the number of groups rather than with every distinct id
+    """
+    template = PLACEHOLDER_PATTERN.sub(' ', normalize_message(message))
+    return tokenize(f"{procedure_name} {error_code or ''} {template}")
+
+
+def _query_terms(q):
+    """Search terms tokenized like messages; a trailing * makes a prefix match"""
+    terms = []
+    for word in (q or '').lower().split():
+        tokens = TOKEN_PATTERN.findall(word)
+        if tokens and word.endswith('*'):
+            tokens[-1] += '*'
+        terms += tokens
+    return terms
+
+
+def group_errors(errors, q=None):
+    """In-memory grouping for error lists that are not indexed (mock data)"""
+    terms = _query_terms(q)
+    groups = {}
+    for error in errors:
+        if terms:
+            tokens = index_terms(error['procedure_name'], error['error_code'], error['error_message'])
+            if not all(
+                any(tok.startswith(t[:-1]) for tok in tokens) if t.endswith('*') else t in tokens
+                for t in terms
+            ):
+                continue
+
+        fp = fingerprint(error['procedure_name'], error['error_code'], error['error_message'])
+        group = groups.get(fp)
+        if not group:
+            groups[fp] = {
+                'fingerprint': fp,
+                'procedure_name': error['procedure_name'],
+                'error_code': error['error_code'],
+                'error_type': error['error_type'],
+                'template': normalize_message(error['error_message']),
+                'sample_message': error['error_message'],
+                'severity': error['severity'],
+                'occurrences': 1,
+                'first_seen': error['error_timestamp'],
+                'last_seen': error['error_timestamp']
+            }
+        else:
+            group['occurrences'] += 1
+            group['first_seen'] = min(group['first_seen'], error['error_timestamp'])
+            group['last_seen'] = max(group['last_seen'], error['error_timestamp'])
+
+    return sorted(groups.values(), key=lambda g: g['last_seen'], reverse=True)
+
+
+class ErrorIndex:
+    """Persistent error groups and inverted index next to the replica"""
+
+    name = 'error_groups'
+    source = 'errors'
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA + derived.SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def is_populated(self):
+        db = self._connect()
+        try:
+            return db.execute('SELECT 1 FROM error_groups LIMIT 1').fetchone() is not None
+        finally:
+            db.close()
+
+    def record(self, errors):
+        """Fold a batch of replicated error dicts into their groups"""
+        with self._lock:
+            db = self._connect()
+            try:
+                groups = {}
+                terms = set()
+                for error in derived.begin(db, self.name, self.source, errors):
+                    fp = fingerprint(error['procedure_name'], error['error_code'], error['error_message'])
+                    ts = error['error_timestamp']
+                    group = groups.get(fp)
+                    if not group:
+                        groups[fp] = [
+                            fp, error['procedure_name'], error['error_code'], error['error_type'],
+                            normalize_message(error['error_message']), error['error_message'],
+                            error['severity'], 1, ts, ts
+                        ]
+                        for term in index_terms(error['procedure_name'], error['error_code'],
+                                                error['error_message']):
+                            terms.add((term, fp))
+                    else:
+                        group[7] += 1
+                        group[8] = min(group[8], ts)
+                        group[9] = max(group[9], ts)
+                        if ts == group[9]:
+                            group[5] = error['error_message']
+
+                db.executemany("""
+                    INSERT INTO error_groups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(fingerprint) DO UPDATE SET
+                        occurrences = occurrences + excluded.occurrences,
+                        first_seen = MIN(first_seen, excluded.first_seen),
+                        sample_message = CASE WHEN excluded.last_seen >= last_seen
+                                              THEN excluded.sample_message ELSE sample_message END,
+                        severity = CASE WHEN excluded.last_seen >= last_seen
+                                        THEN excluded.severity ELSE severity END,
+                        last_seen = MAX(last_seen, excluded.last_seen)
+                """, list(groups.values()))
+                db.executemany('INSERT OR IGNORE INTO error_terms VALUES (?, ?)', list(terms))
+                db.commit()
+            finally:
+                db.close()
+
+    def fetch_groups(self, limit=50, q=None):
+        """Error groups, newest first, optionally matching every search term"""
+        terms = _query_terms(q)
+        if not terms:
+            query = 'SELECT * FROM error_groups ORDER BY last_seen DESC LIMIT ?'
+            params = [limit]
+        else:
+            # One index range scan per term, intersected on fingerprint
+            matches = []
+            params = []
+            for term in terms:
+                if term.endswith('*'):
+                    prefix = term[:-1]
+                    matches.append('SELECT fingerprint FROM error_terms WHERE term >= ? AND term < ?')
+                    params += [prefix, prefix + '\uffff']
+                else:
+                    matches.append('SELECT fingerprint FROM error_terms WHERE term = ?')
+                    params.append(term)
+            query = f"""
+                SELECT * FROM error_groups
+                WHERE fingerprint IN ({' INTERSECT '.join(matches)})
+                ORDER BY last_seen DESC LIMIT ?
+            """
+            params.append(limit)
+
+        db = self._connect()
+        try:
+            return [dict(row) for row in db.execute(query, params).fetchall()]
+        finally:
+            db.close()
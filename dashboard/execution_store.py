@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Columnar Execution-Log Store
+Execution history held as NumPy columns, with procedure and status interned
+as small integer codes. Filters, group-bys and aggregates run vectorized;
+dicts and timestamp strings are built only for the rows a route returns.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+STATUSES = ['SUCCESS', 'FAILED', 'WARNING']
+
+MOCK_PROCEDURES = [
+    'P1_MAIN_SYS_INTERFACES',
+    'P2_POST_PREP_SERV_INTERFACES',
+    'P3_PREP_INTERFACES',
+    'P4_CP_INTERFACES',
+    'P5_ALFA_CP_INTERFACES',
+    'P6_VOLTE_INTERFACES',
+    'P7_DATACARD_INTERFACES'
+]
+
+COLUMNS = {
+    'execution_id': np.int64,
+    'execution_time': 'datetime64[s]',
+    'procedure': np.int16,
+    'status': np.int8,
+    'duration_seconds': np.float64,
+    'records_processed': np.int64,
+    'records_inserted': np.int64,
+    'records_updated': np.int64,
+    'records_deleted': np.int64,
+    'integration_log_id': object,
+}
+
+
+def to_datetime64(moment):
+    return np.datetime64(moment.replace(microsecond=0), 's')
+
+
+class Categorical:
+    """Interned strings: each distinct value is stored once, rows hold its code"""
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        if value not in self._codes:
+            self._codes[value] = len(self.values)
+            self.values.append(value)
+        return self._codes[value]
+
+    def lookup(self, value):
+        """Code of an existing value, -1 when it was never seen"""
+        return self._codes.get(value, -1)
+
+    def encode(self, values):
+        """Vector of strings -> vector of codes (one dict lookup per distinct value)"""
+        distinct, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+        return np.array([self.code(v) for v in distinct], dtype=np.int64)[inverse]
+
+
+class ExecutionStore:
+    """Append-only execution log; rows are kept in execution_time order"""
+
+    def __init__(self, capacity=4096):
+        self.procedures = Categorical()
+        self.statuses = Categorical(STATUSES)
+        self.size = 0
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in COLUMNS.items()}
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        return self._columns[name][:self.size]
+
+    def append(self, procedure_name, status, **columns):
+        """Append a batch; every argument is a sequence of the same length"""
+        batch = dict(columns)
+        batch['procedure'] = self.procedures.encode(procedure_name)
+        batch['status'] = self.statuses.encode(status)
+        batch = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in batch.items()}
+        count = len(batch['execution_time'])
+
+        order = np.argsort(batch['execution_time'], kind='stable')
+        if self.size and count and batch['execution_time'][order[0]] < self.column('execution_time')[-1]:
+            raise ValueError('batch starts before the newest stored execution')
+
+        needed = self.size + count
+        capacity = len(self._columns['execution_id'])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, array in self._columns.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self._columns[name] = grown
+
+        for name, array in self._columns.items():
+            array[self.size:needed] = batch[name][order]
+        self.size = needed
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def select(self, start=None, end=None, procedure=None, status=None):
+        """Row positions (ascending time) matching every given filter"""
+        times = self.column('execution_time')
+        lo = np.searchsorted(times, to_datetime64(start), 'left') if start else 0
+        hi = np.searchsorted(times, to_datetime64(end), 'right') if end else self.size
+
+        mask = np.ones(hi - lo, dtype=bool)
+        if procedure:
+            mask &= self.column('procedure')[lo:hi] == self.procedures.lookup(procedure)
+        if status:
+            mask &= self.column('status')[lo:hi] == self.statuses.lookup(status)
+        return np.flatnonzero(mask) + lo
+
+    def summary(self, rows):
+        counts = np.bincount(self.column('status')[rows], minlength=len(self.statuses))
+        return {
+            'total': len(rows),
+            **{status: int(counts[self.statuses.lookup(status)]) for status in STATUSES},
+            'avg_duration': float(self.column('duration_seconds')[rows].mean()) if len(rows) else 0.0,
+            'total_records': int(self.column('records_processed')[rows].sum()),
+            'last_time': self._format_times(self.column('execution_time')[rows[-1:]])[0] if len(rows) else None,
+        }
+
+    def by_procedure(self, rows, quantiles=()):
+        """Per-procedure counts, mean/quantile duration, records/s quantiles, last run"""
+        codes = self.column('procedure')[rows]
+        status = self.column('status')[rows]
+        duration = self.column('duration_seconds')[rows]
+        n = len(self.procedures)
+
+        total = np.bincount(codes, minlength=n)
+        successful = np.bincount(codes, weights=status == self.statuses.lookup('SUCCESS'), minlength=n)
+        failed = np.bincount(codes, weights=status == self.statuses.lookup('FAILED'), minlength=n)
+        duration_sum = np.bincount(codes, weights=duration, minlength=n)
+
+        # Rows are time-ordered, so a procedure's last run is its last position
+        present, last_reversed = np.unique(codes[::-1], return_index=True)
+        last_times = self._format_times(self.column('execution_time')[rows][len(rows) - 1 - last_reversed])
+
+        # Group rows by procedure once for the quantiles
+        order = np.argsort(codes, kind='stable')
+        groups = np.split(order, np.cumsum(total)[:-1])
+        throughput = self.column('records_processed')[rows] / np.maximum(duration, 1e-9)
+
+        result = []
+        for code, last_time in zip(present, last_times):
+            group = groups[code]
+            entry = {
+                'procedure_name': self.procedures.values[code],
+                'total_runs': int(total[code]),
+                'successful_runs': int(successful[code]),
+                'failed_runs': int(failed[code]),
+                'avg_duration': float(duration_sum[code] / total[code]),
+                'last_run_time': last_time,
+            }
+            if quantiles:
+                entry['duration_quantiles'] = np.quantile(duration[group], quantiles).tolist()
+                entry['throughput_quantiles'] = np.quantile(throughput[group], quantiles).tolist()
+            result.append(entry)
+        return result
+
+    def by_interval(self, rows, start, interval_seconds, intervals):
+        """Counts and mean duration per fixed interval starting at `start`"""
+        offsets = (self.column('execution_time')[rows] - to_datetime64(start)).astype(np.int64)
+        bucket = offsets // interval_seconds
+        keep = (bucket >= 0) & (bucket < intervals)
+        bucket = bucket[keep]
+        status = self.column('status')[rows][keep]
+
+        executions = np.bincount(bucket, minlength=intervals)
+        successful = np.bincount(bucket, weights=status == self.statuses.lookup('SUCCESS'), minlength=intervals)
+        failed = np.bincount(bucket, weights=status == self.statuses.lookup('FAILED'), minlength=intervals)
+        duration = np.bincount(bucket, weights=self.column('duration_seconds')[rows][keep], minlength=intervals)
+        avg_duration = np.divide(duration, executions, out=np.zeros(intervals), where=executions > 0)
+        return executions, successful.astype(np.int64), failed.astype(np.int64), avg_duration
+
+    # ------------------------------------------------------------------
+    # Serialization (only for returned rows)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _format_times(times):
+        return [t.replace('T', ' ') for t in np.datetime_as_string(times, unit='s').tolist()]
+
+    def rows(self, rows=None, limit=None, newest_first=True):
+        """Execution dicts for `rows` (all by default), newest first"""
+        rows = np.arange(self.size) if rows is None else rows
+        if newest_first:
+            rows = rows[::-1]
+        rows = rows[:limit] if limit is not None else rows
+
+        procedures = np.array(self.procedures.values, dtype=object)
+        statuses = np.array(self.statuses.values, dtype=object)
+        columns = {
+            'id': self.column('execution_id')[rows].tolist(),
+            'procedure_name': procedures[self.column('procedure')[rows]].tolist(),
+            'execution_time': self._format_times(self.column('execution_time')[rows]),
+            'status': statuses[self.column('status')[rows]].tolist(),
+            'duration_seconds': self.column('duration_seconds')[rows].tolist(),
+            'records_processed': self.column('records_processed')[rows].tolist(),
+            'records_inserted': self.column('records_inserted')[rows].tolist(),
+            'records_updated': self.column('records_updated')[rows].tolist(),
+            'records_deleted': self.column('records_deleted')[rows].tolist(),
+            'integration_log_id': self.column('integration_log_id')[rows].tolist(),
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+# ----------------------------------------------------------------------
+# Mock history
+# ----------------------------------------------------------------------
+
+def generate_mock_store(days=365, runs_per_hour=20, end=None, seed=None):
+    """A year of synthetic runs, generated column-wise"""
+    rng = np.random.default_rng(seed)
+    end = to_datetime64(end or datetime.now())
+    n = days * 24 * runs_per_hour
+
+    ages = np.sort(rng.integers(0, days * 86400, n))[::-1]
+    ids = np.arange(1, n + 1)
+    store = ExecutionStore(capacity=n)
+    store.append(
+        procedure_name=np.array(MOCK_PROCEDURES, dtype=object)[rng.integers(0, len(MOCK_PROCEDURES), n)],
+        status=np.array(STATUSES, dtype=object)[rng.choice(len(STATUSES), n, p=[0.85, 0.08, 0.07])],
+        execution_id=ids,
+        execution_time=end - ages.astype('timedelta64[s]'),
+        duration_seconds=np.rint(rng.lognormal(5, 0.5, n)),
+        records_processed=rng.integers(1000, 50001, n),
+        records_inserted=rng.integers(0, 5001, n),
+        records_updated=rng.integers(0, 3001, n),
+        records_deleted=rng.integers(0, 501, n),
+        integration_log_id=np.char.add('LOG_', (ids + 999).astype(str)).astype(object),
+    )
+    return store
+
+
+_mock_store = None
+_mock_built = 0.0
+_mock_lock = threading.Lock()
+
+
+def mock_store(max_age_seconds=300):
+    """Shared mock history, regenerated every few minutes so 'now' moves on"""
+    global _mock_store, _mock_built
+    with _mock_lock:
+        if _mock_store is None or time.time() - _mock_built > max_age_seconds:
+            _mock_store = generate_mock_store()
+            _mock_built = time.time()
+        return _mock_store
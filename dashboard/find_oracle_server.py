@@ -2,11 +2,63 @@
 """
 Oracle Database Discovery Script
 Attempts to find the Oracle database server on your network
+
+Fast mode (concurrent asyncio scan, TNS fingerprinting, JSON output):
+    python3 find_oracle_server.py --scan 192.168.41.0/24 --ports 1521,1522 --json
 """
 
+import argparse
+import json
 import socket
 import subprocess
 import os
+import sys
+
+from oracle_discovery import DEFAULT_PORTS, DEFAULT_TNS_LOCATIONS, discover, find_alias, parse_tnsnames
+
+parser = argparse.ArgumentParser(description='Find the Oracle database server for the HLR dashboard')
+parser.add_argument('--scan', action='append', default=[], metavar='CIDR',
+                    help='CIDR range, IP or hostname to probe (repeatable or comma-separated)')
+parser.add_argument('--ports', default=','.join(str(p) for p in DEFAULT_PORTS),
+                    help='comma-separated ports to probe')
+parser.add_argument('--concurrency', type=int, default=256, help='max connections in flight')
+parser.add_argument('--timeout', type=float, default=1.0, help='per-probe timeout in seconds')
+parser.add_argument('--service', default='RECON_GEOX', help='service name to ask listeners for')
+parser.add_argument('--tnsnames', action='append', default=[], metavar='PATH',
+                    help='additional tnsnames.ora to parse')
+parser.add_argument('--json', action='store_true', help='print a machine-readable result')
+args = parser.parse_args()
+
+if args.scan or args.json or args.tnsnames:
+    result = discover(
+        targets=[t for spec in args.scan for t in spec.split(',')],
+        ports=[int(p) for p in args.ports.split(',') if p],
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        service_name=args.service,
+        tns_locations=args.tnsnames + DEFAULT_TNS_LOCATIONS
+    )
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("=" * 60)
+        print(f"🔍 Probed {result['probed']} host:port pairs in {result['elapsed_seconds']}s")
+        print("=" * 60)
+        for alias, entry in result['tns_entries'].items():
+            addresses = ', '.join(f"{h}:{p}" for h, p in entry['addresses'])
+            print(f"   📁 {alias} → {addresses} (service={entry['service_name'] or entry['sid']})")
+        for listener in result['listeners']:
+            service = {True: '🎯 knows', False: '❌ does not know', None: '❔ unknown for'}[listener['service_known']]
+            version = f" v{listener['version']}" if listener.get('version') else ''
+            print(f"   ✅ Oracle listener at {listener['host']}:{listener['port']}{version} — {service} {result['service_name']}")
+        for other in result['other_open_ports']:
+            print(f"   ⚪ {other['host']}:{other['port']} is open but not an Oracle listener")
+        if not result['listeners']:
+            print("   ❌ No Oracle listener found")
+        print("=" * 60)
+
+    sys.exit(0 if result['listeners'] else 1)
 
 print("=" * 60)
 print("🔍 Searching for Oracle Database Server...")
@@ -115,17 +167,11 @@ for location in common_tns_locations:
     expanded = os.path.expandvars(location)
     if os.path.exists(expanded):
         print(f"   ✅ Found: {expanded}")
-        try:
-            with open(expanded, 'r') as f:
-                content = f.read()
-                if 'RECON_GEOX' in content:
-                    print("   🎯 Found RECON_GEOX in this file!")
-                    # Extract host info
-                    for line in content.split('\n'):
-                        if 'HOST' in line.upper():
-                            print(f"      {line.strip()}")
-        except:
-            pass
+        entries = find_alias(parse_tnsnames(expanded), 'RECON_GEOX')
+        for alias, entry in entries.items():
+            print(f"   🎯 Found {alias} in this file!")
+            for host, port in entry['addresses']:
+                print(f"      HOST = {host}  PORT = {port}")
 
 print("\n" + "=" * 60)
 print("📊 Summary & Recommendations")
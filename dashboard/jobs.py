@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+On-Demand Reconciliation Jobs
+In-process job queue behind /api/jobs: runs an interface or PROV_RECON_*
+step with admission control (per-procedure limits, nightly batch, heavy
+jobs first) and tracks the current Oracle operation's progress while it runs
+"""
+
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+PACKAGE = 'RECONCILIATION_INTERFACES'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Interfaces share the signature
+# (INTEGRATION_LOG_ID IN, RESULT OUT, P_ENT_TYPE IN, P_ENT_CODE IN)
+INTERFACES = [
+    'P1_MAIN_SYS_INTERFACES',
+    'P1_CALL_COMPLETION_INTERFACES',
+    'P1_HLR_RECON_MONTH_INTERFACES',
+    'P2_POST_PREP_SERV_INTERFACES',
+    'P2_POST_SUSP_SERV_INTERFACES',
+    'P3_PREP_INTERFACES',
+    'P4_CP_INTERFACES',
+    'P4_WLL_CP_INTERFACES',
+    'P_IA_CP_INTERFACES',
+    'P_MTROAMING_CP_INTERFACES',
+    'P5_ALFA_CP_INTERFACES',
+    'P6_VOLTE_INTERFACES',
+    'P7_DATACARD_INTERFACES',
+]
+
+# PROV_RECON_* steps: positional IN parameters as declared in the package spec
+STEPS = {
+    'PROV_RECON_SERVICES_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'CP_PRODUCT', 'HLR'],
+    'PROV_RECON_SERVICES': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'PRODUCT', 'HLR'],
+    'PROV_RECON_VPN_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'CP_PRODUCT', 'HLR'],
+    'PROV_RECON_SMS_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'CP_PRODUCT', 'HLR', 'SMSMODE'],
+    'PROV_RECON_SMS_ROAMING_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'CP_PRODUCT', 'HLR'],
+    'PROV_RECON_ROAMING_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'CP_PRODUCT', 'HLR'],
+    'PROV_RECON_MT_ROAMING_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'OPTION_TO_ACT', 'HLR'],
+    'PROV_RECON_SCHAR_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'SCHAR_VALUE'],
+    'PROV_RECON_BS3G_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'SCHAR_VALUE'],
+    'PROV_RECON_RSA_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'RSA_VALUE'],
+    'PROV_RECON_CSP_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'CSP_VALUE', 'OCSIST_VALUE'],
+    'PROV_RECON_TS11_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'TS11_VALUE'],
+    'PROV_RECON_VOLTE_CPS': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'SERVICE_TYPE', 'SCP_OPTION', 'CP_PRODUCT'],
+    'PROV_RECON_APN_MODIFY_PARAM': ['SCHEMA_OWNER', 'RECON_TABLE_NAME', 'ACTION', 'HLR'],
+}
+
+# Every PROV_RECON_* step splices its parameters into CREATE TABLE DDL, so
+# nothing reaches the package unless it matches these rules
+IDENTIFIER = re.compile(r'^[A-Z][A-Z0-9_$#]{0,29}$')
+RECON_TABLE = re.compile(r'^REP_[A-Z0-9_$#]{1,26}$')
+INTEGRATION_LOG_ID = re.compile(r'^[0-9]{1,18}$')
+
+# Allowed values, taken from the nightly calls in the package body
+PARAM_VALUES = {
+    'OPTION_TO_ACT': ('CREATE_ACTIVATE', 'DELETE'),
+    'HLR': ('1', '2'),
+    'SMSMODE': ('BOTH', 'MO', 'MT'),
+    'ACTION': ('DELETE', 'UPDATE'),
+    'SCHAR_VALUE': ('0', '4', '6', '8', '10'),
+    'RSA_VALUE': ('6', '8'),
+    'CSP_VALUE': ('1', '2'),
+    'OCSIST_VALUE': ('1',),
+    'TS11_VALUE': ('0', '1'),
+}
+STEP_VALUES = {
+    'PROV_RECON_VPN_CPS': {'CP_PRODUCT': ('VPN',)},
+    'PROV_RECON_SMS_CPS': {'CP_PRODUCT': ('SMS',)},
+    'PROV_RECON_SMS_ROAMING_CPS': {'CP_PRODUCT': ('IA', 'KSA_ROAMING', 'LIMITED_IA', 'SMS_ROAMING')},
+    'PROV_RECON_ROAMING_CPS': {'CP_PRODUCT': ('ROAMING',)},
+    'PROV_RECON_BS3G_PARAM': {'SCHAR_VALUE': ('0', '1')},
+}
+
+# Oracle-side progress for the job's own session (full scans, sorts,
+# hash joins, CTAS). sofar/totalwork are per operation and in that
+# operation's units (blocks, rows, ...), so only the latest one is reported
+LONGOPS_QUERY = """
+    SELECT opname, target, sofar, totalwork, units, elapsed_seconds, time_remaining
+    FROM v$session_longops
+    WHERE sid = :sid AND serial# = :serial AND totalwork > 0
+    ORDER BY last_update_time DESC, start_time DESC
+"""
+
+# Nightly procedures currently executing in other sessions
+BATCH_QUERY = """
+    SELECT DISTINCT p.procedure_name
+    FROM v$session s
+    JOIN all_procedures p
+      ON p.object_id = s.plsql_entry_object_id AND p.subprogram_id = s.plsql_entry_subprogram_id
+    WHERE p.object_name = :package AND s.status = 'ACTIVE'
+      AND NVL(s.module, '-') <> :module
+"""
+MODULE = 'HLR_DASHBOARD_JOB'
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELLED'
+
+
+class JobError(ValueError):
+    """Invalid job request"""
+
+
+def validate(procedure, name, value, schemas):
+    """Normalized parameter value; raises JobError for anything not allowed"""
+    value = str(value).strip().upper()
+    allowed = STEP_VALUES.get(procedure, {}).get(name, PARAM_VALUES.get(name))
+    if name == 'INTEGRATION_LOG_ID':
+        valid = INTEGRATION_LOG_ID.match(value)
+    elif name == 'SCHEMA_OWNER':
+        valid = IDENTIFIER.match(value) and value in {s.upper() for s in schemas}
+    elif name == 'RECON_TABLE_NAME':
+        valid = RECON_TABLE.match(value)
+    elif allowed:
+        valid = value in allowed
+    else:
+        # Free product / service names (PRODUCT, SERVICE_TYPE, SCP_OPTION, ...)
+        valid = IDENTIFIER.match(value)
+    if not valid:
+        raise JobError(f"invalid {name} {value!r}" + (f", expected one of {list(allowed)}" if allowed else ''))
+    return value
+
+
+def catalog():
+    """Everything the dashboard may enqueue, with its parameters"""
+    items = [{'procedure': name, 'kind': 'interface', 'params': ['INTEGRATION_LOG_ID']} for name in INTERFACES]
+    items += [{'procedure': name, 'kind': 'step', 'params': params} for name, params in STEPS.items()]
+    return items
+
+
+class Job:
+    def __init__(self, procedure, params, submitted_by):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.procedure = procedure
+        self.params = params
+        self.submitted_by = submitted_by
+        self.status = QUEUED
+        self.wait_reason = None
+        self.result = None
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {'operation': None, 'done': None, 'total': None, 'units': None,
+                         'percent': None, 'per_second': None, 'eta_seconds': None, 'source': None}
+
+    def to_dict(self):
+        def fmt(moment):
+            return moment.strftime(TIME_FORMAT) if moment else None
+
+        elapsed = None
+        if self.started_at:
+            elapsed = round(((self.finished_at or datetime.now()) - self.started_at).total_seconds(), 1)
+
+        return {
+            'job_id': self.job_id,
+            'procedure': self.procedure,
+            'params': self.params,
+            'submitted_by': self.submitted_by,
+            'status': self.status,
+            'wait_reason': self.wait_reason,
+            'result': self.result,
+            'error': self.error,
+            'submitted_at': fmt(self.submitted_at),
+            'started_at': fmt(self.started_at),
+            'finished_at': fmt(self.finished_at),
+            'elapsed_seconds': elapsed,
+            'progress': dict(self.progress),
+        }
+
+
+class JobRunner:
+    """Queue + scheduler thread; each admitted job gets its own worker"""
+
+    def __init__(self, connect, max_concurrent=2, concurrency_limits=None,
+                 heavy_procedures=(), nightly_window=None, history=None, keep_finished=200,
+                 schemas=()):
+        self.connect = connect
+        self.schemas = schemas
+        self.max_concurrent = max_concurrent
+        self.concurrency_limits = concurrency_limits or {}
+        self.heavy_procedures = set(heavy_procedures)
+        self.nightly_window = nightly_window
+        # history(procedure) -> (typical records, typical duration seconds)
+        self.history = history
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self._order = []
+        self._cond = threading.Condition()
+        threading.Thread(target=self._schedule, name='job-scheduler', daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, procedure, params, submitted_by):
+        procedure = (procedure or '').upper()
+        params = {k.upper(): v for k, v in (params or {}).items()}
+        if procedure in INTERFACES:
+            params.setdefault('INTEGRATION_LOG_ID', '0')  # package default
+            expected = ['INTEGRATION_LOG_ID']
+        elif procedure in STEPS:
+            expected = STEPS[procedure]
+        else:
+            raise JobError(f"unknown procedure {procedure!r}")
+
+        missing = [p for p in expected if params.get(p) in (None, '')]
+        unknown = [p for p in params if p not in expected]
+        if missing or unknown:
+            raise JobError(f"missing {missing or '-'}, unexpected {unknown or '-'}")
+
+        job = Job(procedure, {p: validate(procedure, p, params[p], self.schemas) for p in expected}, submitted_by)
+        with self._cond:
+            self.jobs[job.job_id] = job
+            self._order.append(job.job_id)
+            self._trim()
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, job_id):
+        """Only queued jobs can be cancelled; a running procedure is left alone"""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if not job or job.status != QUEUED:
+                return False
+            job.status = CANCELLED
+            job.wait_reason = None
+            job.finished_at = datetime.now()
+            self._cond.notify_all()
+            return True
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self):
+        return [self.jobs[j].to_dict() for j in reversed(self._order) if j in self.jobs]
+
+    # ------------------------------------------------------------------
+    # Admission control
+    # ------------------------------------------------------------------
+
+    def _in_nightly_window(self):
+        if not self.nightly_window:
+            return False
+        start, end = self.nightly_window
+        hour = datetime.now().hour
+        return start <= hour < end if start < end else hour >= start or hour < end
+
+    def _nightly_batch(self):
+        """Why the nightly batch blocks jobs right now, None when it does not"""
+        if self._in_nightly_window():
+            return 'nightly batch window'
+        conn = self.connect()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(BATCH_QUERY, package=PACKAGE, module=MODULE)
+            procedures = sorted(row[0] for row in cursor.fetchall() if row[0])
+        except Exception:
+            return None  # no access to v$session: the hour window still applies
+        finally:
+            conn.close()
+        return f"nightly batch running ({', '.join(procedures)})" if procedures else None
+
+    def _admission(self, job, running, heavy_waiting, batch=None):
+        """None when the job may start now, otherwise the reason it waits"""
+        if heavy_waiting:
+            return 'queued behind a heavy job'
+        if len(running) >= self.max_concurrent:
+            return 'all job slots busy'
+        if batch:
+            return batch
+        if any(r.procedure in self.heavy_procedures for r in running):
+            return 'queued behind a heavy job'
+        if job.procedure in self.heavy_procedures and running:
+            return 'heavy job waits for running jobs to finish'
+        limit = self.concurrency_limits.get(job.procedure, self.concurrency_limits.get('default', 1))
+        if sum(r.procedure == job.procedure for r in running) >= limit:
+            return f'{job.procedure} concurrency limit ({limit}) reached'
+        return None
+
+    def _schedule(self):
+        while True:
+            with self._cond:
+                queued = any(j.status == QUEUED for j in self.jobs.values())
+            # Outside the lock: asks Oracle which nightly procedures are active
+            batch = self._nightly_batch() if queued else None
+            with self._cond:
+                running = [j for j in self.jobs.values() if j.status == RUNNING]
+                heavy_waiting = False
+                for job_id in self._order:
+                    job = self.jobs.get(job_id)
+                    if not job or job.status != QUEUED:
+                        continue
+                    job.wait_reason = self._admission(job, running, heavy_waiting, batch)
+                    # A waiting heavy job is not overtaken by later submissions
+                    heavy_waiting |= job.wait_reason is not None and job.procedure in self.heavy_procedures
+                    if job.wait_reason is None:
+                        job.status = RUNNING
+                        job.started_at = datetime.now()
+                        running.append(job)
+                        threading.Thread(target=self._run, args=(job,), name=f'job-{job.job_id}',
+                                         daemon=True).start()
+                # Re-check periodically so the nightly batch can start and finish
+                self._cond.wait(timeout=30)
+
+    def _trim(self):
+        finished = [j for j in self._order if self.jobs[j].status not in (QUEUED, RUNNING)]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self.jobs[job_id]
+            self._order.remove(job_id)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _run(self, job):
+        conn = self.connect()
+        monitor_stop = threading.Event()
+        try:
+            if not conn:
+                raise RuntimeError('database not available')
+
+            cursor = conn.cursor()
+            cursor.execute("SELECT SYS_CONTEXT('USERENV', 'SID'), "
+                           "(SELECT serial# FROM v$session WHERE sid = SYS_CONTEXT('USERENV', 'SID')) FROM DUAL")
+            sid, serial = cursor.fetchone()
+            cursor.callproc('DBMS_APPLICATION_INFO.SET_MODULE', [MODULE, job.job_id])
+
+            threading.Thread(target=self._monitor, args=(job, int(sid), serial, monitor_stop),
+                             name=f'job-monitor-{job.job_id}', daemon=True).start()
+
+            name = f'{PACKAGE}.{job.procedure}'
+            if job.procedure in INTERFACES:
+                result = cursor.var(str)
+                cursor.callproc(name, [job.params['INTEGRATION_LOG_ID'], result, 4, 1])
+                job.result = result.getvalue()
+            else:
+                cursor.callproc(name, [job.params[p] for p in STEPS[job.procedure]])
+                job.result = 'DONE'
+            cursor.close()
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            print(f"❌ [JOB] {job.job_id} {job.procedure} failed: {e}")
+        finally:
+            monitor_stop.set()
+            if conn:
+                conn.close()
+            job.finished_at = datetime.now()
+            if job.status == SUCCEEDED:
+                job.progress.update(percent=100, eta_seconds=0)
+            with self._cond:
+                self._trim()
+                self._cond.notify_all()
+
+    def _monitor(self, job, sid, serial, stop, interval=2):
+        """Refresh progress from V$SESSION_LONGOPS, else from run history"""
+        conn = self.connect()
+        typical_rows, typical_seconds = (self.history(job.procedure) if self.history else (None, None))
+        try:
+            cursor = conn.cursor() if conn else None
+            while not stop.wait(interval):
+                elapsed = (datetime.now() - job.started_at).total_seconds()
+                row = None
+                if cursor:
+                    try:
+                        cursor.execute(LONGOPS_QUERY, sid=sid, serial=serial)
+                        row = cursor.fetchone()
+                    except Exception:
+                        cursor = None  # no access to v$session_longops
+                if row:
+                    opname, target, sofar, total, units, op_elapsed, remaining = row
+                    job.progress.update(operation=f'{opname} {target}' if target else opname,
+                                        done=int(sofar), total=int(total), units=units,
+                                        percent=min(round(sofar * 100 / total), 100),
+                                        per_second=round(sofar / op_elapsed, 1) if op_elapsed else None,
+                                        eta_seconds=remaining, source='longops')
+                elif typical_seconds:
+                    fraction = min(elapsed / typical_seconds, 0.99)
+                    job.progress.update(operation=None,
+                                        done=int(fraction * typical_rows) if typical_rows else None,
+                                        total=typical_rows, units='records' if typical_rows else None,
+                                        percent=round(fraction * 100),
+                                        per_second=round(typical_rows / typical_seconds, 1) if typical_rows else None,
+                                        eta_seconds=round(max(typical_seconds - elapsed, 0)), source='estimate')
+        finally:
+            if conn:
+                conn.close()
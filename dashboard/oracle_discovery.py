@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Concurrent Oracle Listener Discovery
+asyncio probing of CIDR ranges and port sets, TNS listener fingerprinting
+and a tnsnames.ora parser (with IFILE includes) for find_oracle_server.py
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import os
+import re
+import struct
+import time
+
+DEFAULT_PORTS = [1521, 1522, 1526, 2483]
+DEFAULT_TNS_LOCATIONS = [
+    '/etc/tnsnames.ora',
+    '/opt/oracle/network/admin/tnsnames.ora',
+    '~/.tnsnames.ora',
+    '$TNS_ADMIN/tnsnames.ora',
+    '$ORACLE_HOME/network/admin/tnsnames.ora',
+]
+
+# TNS packet types
+TNS_CONNECT = 1
+TNS_ACCEPT = 2
+TNS_REFUSE = 4
+TNS_REDIRECT = 5
+TNS_RESEND = 11
+TNS_PACKET_NAMES = {
+    TNS_ACCEPT: 'ACCEPT',
+    TNS_REFUSE: 'REFUSE',
+    TNS_REDIRECT: 'REDIRECT',
+    TNS_RESEND: 'RESEND',
+}
+TNS_HEADER_SIZE = 8
+CONNECT_DATA_OFFSET = 58
+
+# ----------------------------------------------------------------------
+# tnsnames.ora
+# ----------------------------------------------------------------------
+
+_TOKEN = re.compile(r'\(|\)|=|[^()=\s]+')
+
+
+def _parse_value(tokens, pos):
+    """Parse `(KEY = value)` lists into nested (key, value) tuples"""
+    items = []
+    while pos < len(tokens) and tokens[pos] == '(':
+        key = tokens[pos + 1].upper()
+        pos += 3  # '(' KEY '='
+        if pos < len(tokens) and tokens[pos] == '(':
+            value, pos = _parse_value(tokens, pos)
+        else:
+            words = []
+            while pos < len(tokens) and tokens[pos] != ')':
+                words.append(tokens[pos])
+                pos += 1
+            value = ' '.join(words)
+        if pos >= len(tokens) or tokens[pos] != ')':
+            raise IndexError('unbalanced parentheses')
+        pos += 1
+        items.append((key, value))
+    return items, pos
+
+
+def _find(node, key):
+    """All values for `key` anywhere under a parsed node"""
+    found = []
+    if isinstance(node, list):
+        for k, v in node:
+            if k == key:
+                found.append(v)
+            found.extend(_find(v, key))
+    return found
+
+
+def parse_tnsnames(path, _seen=None):
+    """Return {ALIAS: {'addresses': [(host, port)], 'service_name', 'sid', 'source'}}"""
+    path = os.path.abspath(os.path.expanduser(os.path.expandvars(path)))
+    _seen = _seen if _seen is not None else set()
+    if path in _seen or not os.path.isfile(path):
+        return {}
+    _seen.add(path)
+
+    with open(path, 'r', errors='replace') as f:
+        text = '\n'.join(line.split('#', 1)[0] for line in f)
+
+    entries = {}
+    tokens = _TOKEN.findall(text)
+    pos = 0
+    names = ''
+    while pos < len(tokens):
+        # ALIAS[, ALIAS2] = (DESCRIPTION ...)  |  IFILE = path
+        if tokens[pos] != '=':
+            names += tokens[pos] if tokens[pos] not in '()' else ''
+            pos += 1
+            continue
+        pos += 1
+
+        if names.upper() == 'IFILE':
+            include = tokens[pos].strip('"\'')
+            if not os.path.isabs(include):
+                include = os.path.join(os.path.dirname(path), include)
+            entries.update(parse_tnsnames(include, _seen))
+            pos += 1
+            names = ''
+            continue
+
+        try:
+            description, pos = _parse_value(tokens, pos)
+        except IndexError:
+            break  # truncated file: keep what parsed cleanly
+        entry = {
+            'addresses': [
+                (host, int(port))
+                for address in _find(description, 'ADDRESS')
+                for host in _find(address, 'HOST')
+                for port in (_find(address, 'PORT') or ['1521'])
+                if port.isdigit()
+            ],
+            'service_name': next(iter(_find(description, 'SERVICE_NAME')), None),
+            'sid': next(iter(_find(description, 'SID')), None),
+            'source': path,
+        }
+        for name in names.split(','):
+            if name:
+                entries[name.upper()] = entry
+        names = ''
+
+    return entries
+
+
+def find_alias(entries, name):
+    """Entries for `name`, ignoring case and a domain suffix (RECON_GEOX.WORLD)"""
+    name = name.split('.', 1)[0].upper()
+    return {alias: entry for alias, entry in entries.items() if alias.split('.', 1)[0] == name}
+
+
+def find_tnsnames(locations=DEFAULT_TNS_LOCATIONS):
+    """Parse every tnsnames.ora found in the usual locations"""
+    entries = {}
+    for location in locations:
+        expanded = os.path.expanduser(os.path.expandvars(location))
+        if '$' not in expanded and os.path.isfile(expanded):
+            for alias, entry in parse_tnsnames(expanded).items():
+                entries.setdefault(alias, entry)
+    return entries
+
+
+# ----------------------------------------------------------------------
+# TNS fingerprinting
+# ----------------------------------------------------------------------
+
+def build_connect_packet(service_name=None):
+    """Minimal TNS CONNECT; asks for `service_name` or the listener version"""
+    if service_name:
+        connect_data = f'(CONNECT_DATA=(SERVICE_NAME={service_name})(CID=(PROGRAM=find_oracle_server)))'
+    else:
+        connect_data = '(CONNECT_DATA=(COMMAND=version))'
+    data = connect_data.encode('ascii')
+
+    body = struct.pack(
+        '>HHHHHHHHHHIBB',
+        314,            # version
+        300,            # lowest compatible version
+        0,              # service options
+        2048,           # session data unit
+        32767,          # max transmission data unit
+        0x4F98,         # NT protocol characteristics
+        0,              # line turnaround
+        1,              # value of 1 in hardware byte order
+        len(data),
+        CONNECT_DATA_OFFSET,
+        0,              # max receivable connect data
+        0, 0            # connect flags
+    )
+    body = body.ljust(CONNECT_DATA_OFFSET - TNS_HEADER_SIZE, b'\x00')
+    length = TNS_HEADER_SIZE + len(body) + len(data)
+    header = struct.pack('>HHBBH', length, 0, TNS_CONNECT, 0, 0)
+    return header + body + data
+
+
+def decode_vsnnum(vsnnum):
+    """VSNNUM=186647040 -> '11.2.0.2.0'"""
+    v = int(vsnnum)
+    return f'{v >> 24}.{(v >> 20) & 0xF}.{(v >> 12) & 0xFF}.{(v >> 8) & 0xF}.{v & 0xFF}'
+
+
+def parse_tns_response(packet):
+    """Classify a listener reply; None when it is not a TNS packet"""
+    if len(packet) < TNS_HEADER_SIZE:
+        return None
+    length, _, packet_type, _, _ = struct.unpack('>HHBBH', packet[:TNS_HEADER_SIZE])
+    if packet_type not in TNS_PACKET_NAMES or length < TNS_HEADER_SIZE:
+        return None
+
+    text = packet[TNS_HEADER_SIZE:].decode('ascii', errors='replace')
+    error = re.search(r'\(ERR=(\d+)\)', text)
+    vsn = re.search(r'VSNNUM=(\d+)', text)
+    error_code = int(error.group(1)) if error else None
+
+    if packet_type in (TNS_ACCEPT, TNS_REDIRECT):
+        service_known = True
+    elif error_code in (12505, 12514):
+        service_known = False
+    else:
+        service_known = None
+
+    return {
+        'packet_type': TNS_PACKET_NAMES[packet_type],
+        'error_code': error_code,
+        'version': decode_vsnnum(vsn.group(1)) if vsn else None,
+        'service_known': service_known,
+    }
+
+
+# ----------------------------------------------------------------------
+# Scanner
+# ----------------------------------------------------------------------
+
+def expand_targets(specs):
+    """CIDR ranges, single IPs and hostnames -> hosts, generated lazily"""
+    for spec in specs:
+        spec = spec.strip()
+        if not spec:
+            continue
+        try:
+            network = ipaddress.ip_network(spec, strict=False)
+        except ValueError:
+            yield spec
+            continue
+        for ip in (network.hosts() if network.num_addresses > 1 else network):
+            yield str(ip)
+
+
+async def probe(host, port, timeout=1.0, service_name=None):
+    """Connect, send a TNS CONNECT and fingerprint the reply"""
+    result = {'host': host, 'port': port, 'open': False, 'oracle': False}
+    started = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        result['open'] = True
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        writer.write(build_connect_packet(service_name))
+        await writer.drain()
+        header = await asyncio.wait_for(reader.readexactly(TNS_HEADER_SIZE), timeout)
+        length = struct.unpack('>H', header[:2])[0]
+        rest = b''
+        if TNS_HEADER_SIZE < length <= 65535:
+            rest = await asyncio.wait_for(reader.read(length - TNS_HEADER_SIZE), timeout)
+
+        fingerprint = parse_tns_response(header + rest)
+        if fingerprint:
+            result['oracle'] = True
+            result.update(fingerprint)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        if result['open']:
+            result['error'] = type(e).__name__
+    finally:
+        if writer:
+            writer.close()
+    return result
+
+
+async def scan(pairs, concurrency=256, timeout=1.0, service_name=None):
+    """Probe (host, port) pairs with at most `concurrency` connections in flight
+
+    `pairs` may be any iterable; a probe is only created once a slot is free,
+    so a large CIDR never has more than `concurrency` coroutines alive
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    for host, port in pairs:
+        await semaphore.acquire()
+        task = asyncio.ensure_future(probe(host, port, timeout, service_name))
+        task.add_done_callback(lambda _: semaphore.release())
+        tasks.append(task)
+    return await asyncio.gather(*tasks)
+
+
+def discover(targets=(), ports=DEFAULT_PORTS, concurrency=256, timeout=1.0,
+             service_name='RECON_GEOX', tns_locations=DEFAULT_TNS_LOCATIONS):
+    """Run a full discovery and return a machine-readable result"""
+    started = time.perf_counter()
+    tns_entries = find_tnsnames(tns_locations)
+
+    # Addresses from tnsnames.ora are always probed on their own ports
+    def unique_pairs():
+        seen = set()
+        candidates = itertools.chain(
+            ((h, p) for h in expand_targets(targets) for p in ports),
+            (address for entry in tns_entries.values() for address in entry['addresses']),
+        )
+        for pair in candidates:
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+    results = asyncio.run(scan(unique_pairs(), concurrency, timeout, service_name))
+
+    return {
+        'service_name': service_name,
+        'probed': len(results),
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+        'listeners': [r for r in results if r['oracle']],
+        'other_open_ports': [r for r in results if r['open'] and not r['oracle']],
+        'tns_entries': {
+            alias: dict(entry, addresses=[list(a) for a in entry['addresses']])
+            for alias, entry in tns_entries.items()
+        },
+    }
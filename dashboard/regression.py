@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Performance Regression Detection
+Online EWMA baseline + one-sided CUSUM per procedure over the execution
+stream; change points are kept as regression events for the errors feed
+"""
+
+import math
+import sqlite3
+import threading
+
+import derived
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS regression_state (
+    procedure_name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    variance REAL NOT NULL,
+    cusum REAL NOT NULL,
+    PRIMARY KEY (procedure_name, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS regression_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    procedure_name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    execution_id INTEGER,
+    detected_at TEXT NOT NULL,
+    baseline_value REAL,
+    observed_value REAL,
+    ratio REAL
+);
+CREATE INDEX IF NOT EXISTS idx_regression_time ON regression_events(detected_at);
+"""
+
+REGRESSION_ERROR_TYPE = 'PERFORMANCE_REGRESSION'
+
+# Floor on the standard deviation (in log space) so a perfectly steady
+# procedure does not alarm on noise
+MIN_STD = 0.05
+
+METRIC = 'seconds_per_1k_records'
+METRIC_LABEL, METRIC_UNIT = 'time per 1k records', 's'
+
+
+def run_signal(execution):
+    """Log of seconds per 1k records (larger means slower), None when unusable
+
+    Normalizing by records_processed keeps a bigger input from reading as a
+    slowdown; one signal per run means one event per shift
+    """
+    duration = execution['duration_seconds'] or 0
+    records = execution['records_processed'] or 0
+    if duration <= 0 or records <= 0:
+        return None
+    return math.log(duration * 1000 / records)
+
+
+class RegressionDetector:
+    """Per-procedure change-point detector persisted next to the replica"""
+
+    name = 'regressions'
+    source = 'executions'
+
+    def __init__(self, path, alpha=0.05, slack=0.5, threshold=5.0, warmup_runs=10):
+        self.path = path
+        self.alpha = alpha
+        self.slack = slack
+        self.threshold = threshold
+        self.warmup_runs = warmup_runs
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA + derived.SCHEMA)
+            # Drop state and events of the earlier per-metric (duration,
+            # records/s) detector; the store is rebuilt from the replica
+            if db.execute('SELECT 1 FROM regression_state WHERE metric <> ? LIMIT 1', (METRIC,)).fetchone():
+                db.execute('DELETE FROM regression_state')
+                db.execute('DELETE FROM regression_events')
+                db.execute('DELETE FROM derived_state WHERE store = ?', (self.name,))
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def is_populated(self):
+        db = self._connect()
+        try:
+            return db.execute('SELECT 1 FROM regression_state LIMIT 1').fetchone() is not None
+        finally:
+            db.close()
+
+    def _step(self, state, signal):
+        """Advance one (procedure, metric) state; returns True on a change point"""
+        runs, mean, variance, cusum = state
+        if runs < self.warmup_runs:
+            # Plain running mean/variance until the baseline is meaningful
+            runs += 1
+            delta = signal - mean
+            mean += delta / runs
+            variance += (delta * (signal - mean) - variance) / runs
+            return (runs, mean, variance, 0.0), False
+
+        std = max(math.sqrt(variance), MIN_STD)
+        z = (signal - mean) / std
+        cusum = max(0.0, cusum + z - self.slack)
+
+        if cusum > self.threshold:
+            # Re-learn the baseline from a fresh warm-up window that starts at
+            # the new level, so one shift raises one event and ordinary noise
+            # around the new level does not re-alarm
+            return (1, signal, 0.0, 0.0), True
+
+        delta = signal - mean
+        mean += self.alpha * delta
+        variance = (1 - self.alpha) * (variance + self.alpha * delta * delta)
+        return (runs + 1, mean, variance, cusum), False
+
+    def record(self, executions):
+        """Feed a batch of replicated execution dicts (oldest first)"""
+        with self._lock:
+            db = self._connect()
+            try:
+                states = {}
+                events = []
+                for execution in derived.begin(db, self.name, self.source, executions):
+                    signal = run_signal(execution)
+                    if execution['status'] == 'FAILED' or signal is None:
+                        continue
+                    key = (execution['procedure_name'], METRIC)
+                    if key not in states:
+                        row = db.execute(
+                            'SELECT runs, mean, variance, cusum FROM regression_state '
+                            'WHERE procedure_name = ? AND metric = ?', key
+                        ).fetchone()
+                        states[key] = tuple(row) if row else (0, 0.0, 0.0, 0.0)
+
+                    baseline = states[key][1]
+                    states[key], changed = self._step(states[key], signal)
+                    if changed:
+                        before, after = math.exp(baseline), math.exp(signal)
+                        events.append((
+                            key[0], METRIC, execution['id'], execution['execution_time'],
+                            round(before, 2), round(after, 2), round(after / before, 2)
+                        ))
+
+                db.executemany(
+                    'INSERT OR REPLACE INTO regression_state VALUES (?, ?, ?, ?, ?, ?)',
+                    [key + state for key, state in states.items()]
+                )
+                db.executemany("""
+                    INSERT INTO regression_events
+                        (procedure_name, metric, execution_id, detected_at,
+                         baseline_value, observed_value, ratio)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, events)
+                db.commit()
+            finally:
+                db.close()
+
+            for event in events:
+                print(f"⚠️  [REGRESSION] {event[0]} {event[1]} {event[6]}x baseline at {event[3]}")
+
+    def fetch_events(self, limit=50, procedure_name=None):
+        """Change-point history, newest first"""
+        query = 'SELECT * FROM regression_events'
+        params = []
+        if procedure_name:
+            query += ' WHERE procedure_name = ?'
+            params.append(procedure_name)
+        query += ' ORDER BY detected_at DESC LIMIT ?'
+        params.append(limit)
+
+        db = self._connect()
+        try:
+            return [dict(row) for row in db.execute(query, params).fetchall()]
+        finally:
+            db.close()
+
+    def fetch_error_feed(self, limit=10):
+        """Regression events shaped like rows of the /api/errors feed"""
+        feed = []
+        for event in self.fetch_events(limit):
+            feed.append({
+                'error_id': f"REG-{event['event_id']}",
+                'procedure_name': event['procedure_name'],
+                'error_code': 'PERF-REGRESSION',
+                'error_type': REGRESSION_ERROR_TYPE,
+                'error_message': (
+                    f"{METRIC_LABEL.capitalize()} regressed {event['ratio']}x vs baseline "
+                    f"({event['observed_value']}{METRIC_UNIT} vs {event['baseline_value']}{METRIC_UNIT})"
+                ),
+                'error_timestamp': event['detected_at'],
+                'resolved': False,
+                'severity': 'HIGH' if event['ratio'] >= 1.5 else 'MEDIUM'
+            })
+        return feed
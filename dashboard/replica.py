@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Local Read Replica for the HLR Dashboard
+Tails RECONCILIATION_EXECUTION_LOG and RECONCILIATION_ERRORS by high-water
+mark into an embedded SQLite file so dashboard reads never hit Oracle
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import derived
+import discrepancy_cube
+import error_index
+import regression
+import rollups
+import sketches
+
+SYNC_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS execution_log (
+    execution_id INTEGER PRIMARY KEY,
+    procedure_name TEXT NOT NULL,
+    execution_time TEXT,
+    status TEXT,
+    duration_seconds REAL,
+    records_processed INTEGER,
+    records_inserted INTEGER,
+    records_updated INTEGER,
+    records_deleted INTEGER,
+    integration_log_id TEXT,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_exec_time ON execution_log(execution_time);
+CREATE INDEX IF NOT EXISTS idx_exec_proc_time ON execution_log(procedure_name, execution_time);
+CREATE INDEX IF NOT EXISTS idx_exec_status_time ON execution_log(status, execution_time);
+
+CREATE TABLE IF NOT EXISTS errors (
+    error_id INTEGER PRIMARY KEY,
+    procedure_name TEXT NOT NULL,
+    error_code TEXT,
+    error_type TEXT,
+    error_message TEXT,
+    error_timestamp TEXT,
+    integration_log_id TEXT,
+    resolved_flag TEXT DEFAULT 'N',
+    resolved_timestamp TEXT,
+    severity TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_err_time ON errors(error_timestamp);
+CREATE INDEX IF NOT EXISTS idx_err_resolved ON errors(resolved_flag, error_timestamp);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    source_table TEXT PRIMARY KEY,
+    high_water_mark TEXT,
+    last_sync_time TEXT,
+    rows_synced INTEGER DEFAULT 0
+);
+"""
+
+# Oracle-side tail queries: everything above the stored high-water mark,
+# oldest first, so an interrupted sync resumes exactly where it stopped
+EXECUTION_TAIL_QUERY = """
+    SELECT execution_id, procedure_name, execution_time, status,
+           duration_seconds, records_processed, records_inserted,
+           records_updated, records_deleted, integration_log_id, error_message
+    FROM RECONCILIATION_EXECUTION_LOG
+    WHERE execution_id > :hwm
+    ORDER BY execution_id
+"""
+
+ERROR_TAIL_QUERY = """
+    SELECT error_id, procedure_name, error_code, error_type, error_message,
+           error_timestamp, integration_log_id, resolved_flag,
+           resolved_timestamp, severity
+    FROM RECONCILIATION_ERRORS
+    WHERE error_id > :hwm
+    ORDER BY error_id
+"""
+
+# Resolution is an UPDATE on rows already replicated, so it needs its own
+# watermark on resolved_timestamp rather than on error_id
+RESOLVED_TAIL_QUERY = """
+    SELECT error_id, resolved_flag, resolved_timestamp
+    FROM RECONCILIATION_ERRORS
+    WHERE resolved_timestamp > :hwm
+    ORDER BY resolved_timestamp
+"""
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Replica table and id column behind each derived-store source
+DERIVED_SOURCES = {
+    'executions': ('execution_log', 'execution_id'),
+    'errors': ('errors', 'error_id'),
+}
+
+
+def _fmt(value):
+    """Format Oracle timestamps the same way the dashboard displays them"""
+    if isinstance(value, datetime):
+        return value.strftime(TIME_FORMAT)
+    return value
+
+
+class ReadReplica:
+    """SQLite replica of the dashboard's Oracle source tables"""
+
+    def __init__(self, path, max_lag_seconds=120):
+        self.path = path
+        self.max_lag_seconds = max_lag_seconds
+        self.last_error = None
+        self._lock = threading.Lock()
+        # Stores computed from the replica tables; each catches up from its
+        # own watermark after every sync (see derived.py)
+        self.derived_stores = []
+
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    # ------------------------------------------------------------------
+    # Sync side
+    # ------------------------------------------------------------------
+
+    def _get_hwm(self, db, source_table, default):
+        row = db.execute(
+            'SELECT high_water_mark FROM sync_state WHERE source_table = ?',
+            (source_table,)
+        ).fetchone()
+        return row['high_water_mark'] if row and row['high_water_mark'] is not None else default
+
+    def _set_hwm(self, db, source_table, hwm, rows):
+        db.execute("""
+            INSERT INTO sync_state (source_table, high_water_mark, last_sync_time, rows_synced)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(source_table) DO UPDATE SET
+                high_water_mark = excluded.high_water_mark,
+                last_sync_time = excluded.last_sync_time,
+                rows_synced = sync_state.rows_synced + excluded.rows_synced
+        """, (source_table, str(hwm), datetime.now().strftime(TIME_FORMAT), rows))
+
+    def _tail(self, oracle_conn, query, hwm):
+        """Yield batches of rows above the high-water mark"""
+        cursor = oracle_conn.cursor()
+        cursor.arraysize = SYNC_BATCH_SIZE
+        try:
+            cursor.execute(query, hwm=hwm)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def sync_once(self, oracle_conn):
+        """Pull every new row from Oracle; returns the number of rows copied"""
+        total = 0
+        with self._lock:
+            db = self._connect()
+            try:
+                hwm = int(self._get_hwm(db, 'RECONCILIATION_EXECUTION_LOG', 0))
+                synced = 0
+                for rows in self._tail(oracle_conn, EXECUTION_TAIL_QUERY, hwm):
+                    rows = [tuple(_fmt(v) for v in row) for row in rows]
+                    db.executemany(
+                        'INSERT OR REPLACE INTO execution_log VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+                        rows
+                    )
+                    hwm = rows[-1][0]
+                    synced += len(rows)
+                    self._set_hwm(db, 'RECONCILIATION_EXECUTION_LOG', hwm, len(rows))
+                    db.commit()
+                if not synced:
+                    self._set_hwm(db, 'RECONCILIATION_EXECUTION_LOG', hwm, 0)
+                total += synced
+
+                hwm = int(self._get_hwm(db, 'RECONCILIATION_ERRORS', 0))
+                synced = 0
+                for rows in self._tail(oracle_conn, ERROR_TAIL_QUERY, hwm):
+                    rows = [tuple(_fmt(v) for v in row) for row in rows]
+                    db.executemany(
+                        'INSERT OR REPLACE INTO errors VALUES (?,?,?,?,?,?,?,?,?,?)',
+                        rows
+                    )
+                    hwm = rows[-1][0]
+                    synced += len(rows)
+                    self._set_hwm(db, 'RECONCILIATION_ERRORS', hwm, len(rows))
+                    db.commit()
+                if not synced:
+                    self._set_hwm(db, 'RECONCILIATION_ERRORS', hwm, 0)
+                total += synced
+
+                resolved_hwm = datetime.strptime(
+                    self._get_hwm(db, 'RECONCILIATION_ERRORS.resolved', '1970-01-01 00:00:00'),
+                    TIME_FORMAT
+                )
+                for rows in self._tail(oracle_conn, RESOLVED_TAIL_QUERY, resolved_hwm):
+                    db.executemany(
+                        'UPDATE errors SET resolved_flag = ?, resolved_timestamp = ? WHERE error_id = ?',
+                        [(flag, _fmt(ts), error_id) for error_id, flag, ts in rows]
+                    )
+                    resolved_hwm = rows[-1][2]
+                    total += len(rows)
+                self._set_hwm(db, 'RECONCILIATION_ERRORS.resolved', _fmt(resolved_hwm), 0)
+                db.commit()
+
+                self.last_error = None
+            finally:
+                db.close()
+        self.catch_up()
+        return total
+
+    def catch_up(self):
+        """Fold replicated rows above each derived store's watermark into it"""
+        db = self._connect()
+        try:
+            db.executescript(derived.SCHEMA)
+            marks = {}
+            for store in self.derived_stores:
+                mark = derived.watermark(db, store.name)
+                if mark is None and getattr(store, 'is_populated', lambda: False)():
+                    # Filled by in-process callbacks before watermarks existed,
+                    # i.e. up to the replica's high-water mark
+                    table, key = DERIVED_SOURCES[store.source]
+                    mark = db.execute(f'SELECT MAX({key}) FROM {table}').fetchone()[0] or 0
+                    derived.set_watermark(db, store.name, mark)
+                    db.commit()
+                marks[store.name] = mark or 0
+        finally:
+            db.close()
+
+        for store in self.derived_stores:
+            rows = self.iter_executions if store.source == 'executions' else self.iter_errors
+            for batch in rows(after=marks[store.name]):
+                store.record(batch)
+
+    # ------------------------------------------------------------------
+    # Read side
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _execution_dict(row):
+        return {
+            'id': row[0],
+            'procedure_name': row[1],
+            'execution_time': row[2],
+            'status': row[3],
+            'duration_seconds': row[4],
+            'records_processed': row[5],
+            'records_inserted': row[6],
+            'records_updated': row[7],
+            'records_deleted': row[8],
+            'integration_log_id': row[9]
+        }
+
+    @staticmethod
+    def _error_dict(row):
+        return {
+            'error_id': row[0],
+            'procedure_name': row[1],
+            'error_code': row[2],
+            'error_type': row[3],
+            'error_message': row[4],
+            'error_timestamp': row[5],
+            'resolved': row[7] == 'Y',
+            'severity': row[9]
+        }
+
+    def status(self):
+        """Freshness indicator: time since the last successful sync"""
+        db = self._connect()
+        try:
+            rows = db.execute('SELECT * FROM sync_state').fetchall()
+        finally:
+            db.close()
+
+        tables = {row['source_table']: dict(row) for row in rows}
+        sync_times = [
+            datetime.strptime(row['last_sync_time'], TIME_FORMAT)
+            for row in rows if row['last_sync_time']
+        ]
+        last_sync = min(sync_times) if sync_times else None
+        lag = (datetime.now() - last_sync).total_seconds() if last_sync else None
+
+        return {
+            'last_sync_time': last_sync.strftime(TIME_FORMAT) if last_sync else None,
+            'lag_seconds': round(lag, 1) if lag is not None else None,
+            'max_lag_seconds': self.max_lag_seconds,
+            'fresh': lag is not None and lag <= self.max_lag_seconds,
+            'last_error': self.last_error,
+            'tables': tables
+        }
+
+    def is_populated(self):
+        db = self._connect()
+        try:
+            return db.execute('SELECT 1 FROM execution_log LIMIT 1').fetchone() is not None
+        finally:
+            db.close()
+
+    def fetch_metrics(self, days=7):
+        """Same shape as fetch_real_metrics(), computed from the replica"""
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        db = self._connect()
+        try:
+            row = db.execute("""
+                SELECT
+                    COUNT(*) AS total,
+                    SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END) AS successful,
+                    SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) AS failed,
+                    SUM(CASE WHEN status = 'WARNING' THEN 1 ELSE 0 END) AS warnings,
+                    AVG(duration_seconds) AS avg_duration,
+                    SUM(records_processed) AS total_records,
+                    MAX(execution_time) AS last_execution
+                FROM execution_log
+                WHERE execution_time >= ?
+            """, (since,)).fetchone()
+            active_errors = db.execute(
+                "SELECT COUNT(*) FROM errors WHERE resolved_flag = 'N'"
+            ).fetchone()[0]
+        finally:
+            db.close()
+
+        if not row['total']:
+            return None
+
+        return {
+            'total_executions': row['total'],
+            'successful_executions': row['successful'],
+            'failed_executions': row['failed'],
+            'warning_executions': row['warnings'],
+            'success_rate': round(row['successful'] / row['total'] * 100, 2),
+            'average_duration_seconds': round(row['avg_duration'] or 0, 2),
+            'total_records_processed': row['total_records'] or 0,
+            'last_execution_time': row['last_execution'],
+            'active_errors': active_errors
+        }
+
+    def fetch_procedure_performance(self, days=30):
+        """Same shape as generate_procedure_performance(), from the replica"""
+        since = (datetime.now() - timedelta(days=days)).strftime(TIME_FORMAT)
+        db = self._connect()
+        try:
+            rows = db.execute("""
+                SELECT
+                    procedure_name,
+                    COUNT(*) AS total_runs,
+                    SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END) AS successful_runs,
+                    SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) AS failed_runs,
+                    AVG(duration_seconds) AS avg_duration,
+                    MAX(execution_time) AS last_run_time
+                FROM execution_log
+                WHERE execution_time >= ?
+                GROUP BY procedure_name
+            """, (since,)).fetchall()
+        finally:
+            db.close()
+
+        return [{
+            'procedure_name': row['procedure_name'],
+            'total_runs': row['total_runs'],
+            'successful_runs': row['successful_runs'],
+            'failed_runs': row['failed_runs'],
+            'success_rate': round(row['successful_runs'] / row['total_runs'] * 100, 2),
+            'avg_duration_seconds': round(row['avg_duration'] or 0),
+            'last_run_time': row['last_run_time']
+        } for row in rows]
+
+    def fetch_executions(self, limit=20):
+        db = self._connect()
+        try:
+            rows = db.execute(
+                'SELECT * FROM execution_log ORDER BY execution_time DESC LIMIT ?',
+                (limit,)
+            ).fetchall()
+        finally:
+            db.close()
+        return [self._execution_dict(tuple(r)) for r in rows]
+
+    def iter_executions(self, after=0, batch_size=SYNC_BATCH_SIZE):
+        """Yield replicated executions above `after` in batches, oldest first"""
+        db = self._connect()
+        try:
+            cursor = db.execute(
+                'SELECT * FROM execution_log WHERE execution_id > ? ORDER BY execution_id', (after,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._execution_dict(tuple(r)) for r in rows]
+        finally:
+            db.close()
+
+    def iter_errors(self, after=0, batch_size=SYNC_BATCH_SIZE):
+        """Yield replicated errors above `after` in batches, oldest first"""
+        db = self._connect()
+        try:
+            cursor = db.execute('SELECT * FROM errors WHERE error_id > ? ORDER BY error_id', (after,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._error_dict(tuple(r)) for r in rows]
+        finally:
+            db.close()
+
+    def fetch_errors(self, limit=10):
+        db = self._connect()
+        try:
+            rows = db.execute(
+                'SELECT * FROM errors ORDER BY error_timestamp DESC LIMIT ?',
+                (limit,)
+            ).fetchall()
+        finally:
+            db.close()
+        return [self._error_dict(tuple(r)) for r in rows]
+
+
+def attach_derived_stores(replica, config, connect):
+    """Open the stores computed from the replica and register them for catch-up
+
+    Shared by the dashboard and the standalone agent, so whichever process
+    syncs also keeps rollups, sketches, regressions, error groups and the
+    discrepancy cube current
+    """
+    stores = {
+        'rollups': rollups.RollupStore(config.REPLICA_DB_PATH, config.ROLLUP_RETENTION_DAYS),
+        'sketches': sketches.SketchStore(config.REPLICA_DB_PATH, config.SKETCH_RETENTION_DAYS),
+        'regressions': regression.RegressionDetector(
+            config.REPLICA_DB_PATH,
+            alpha=config.REGRESSION_EWMA_ALPHA,
+            slack=config.REGRESSION_CUSUM_SLACK,
+            threshold=config.REGRESSION_CUSUM_THRESHOLD,
+            warmup_runs=config.REGRESSION_WARMUP_RUNS
+        ),
+        'error_groups': error_index.ErrorIndex(config.REPLICA_DB_PATH),
+        'discrepancies': discrepancy_cube.DiscrepancyCube(config.REPLICA_DB_PATH),
+    }
+    replica.derived_stores += [
+        stores['rollups'],
+        stores['sketches'],
+        stores['regressions'],
+        stores['error_groups'],
+        discrepancy_cube.CubeRefresher(stores['discrepancies'], connect, config.DISCREPANCY_CUBE_TRIGGERS),
+    ]
+    return stores
+
+
+def start_sync_agent(replica, connect, interval_seconds=30):
+    """Run replica.sync_once() every interval on a daemon thread"""
+
+    def run():
+        while True:
+            conn = connect()
+            if conn:
+                try:
+                    replica.sync_once(conn)
+                except Exception as e:
+                    replica.last_error = str(e)
+                    print(f"❌ Replica sync failed: {e}")
+                finally:
+                    conn.close()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name='replica-sync', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    # Standalone sync agent: python3 replica.py
+    import config
+    from db import get_oracle_connection
+
+    replica = ReadReplica(config.REPLICA_DB_PATH, config.REPLICA_MAX_LAG_SECONDS)
+    attach_derived_stores(replica, config, get_oracle_connection)
+    replica.catch_up()
+    print("=" * 60)
+    print(f"🔁 Replica sync agent → {config.REPLICA_DB_PATH}")
+    print(f"   Interval: {config.REPLICA_SYNC_INTERVAL_SECONDS}s | Max lag: {config.REPLICA_MAX_LAG_SECONDS}s")
+    print("=" * 60)
+    start_sync_agent(replica, get_oracle_connection, config.REPLICA_SYNC_INTERVAL_SECONDS).join()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Multi-Resolution Time-Series Rollups
+Keeps 1-minute, 1-hour and 1-day execution aggregates with per-tier
+retention, and picks the tier plus LTTB downsampling for chart queries
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import derived
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# tier name -> (bucket size in seconds, label format for charts)
+TIERS = {
+    '1m': (60, '%H:%M'),
+    '1h': (3600, '%H:00'),
+    '1d': (86400, '%Y-%m-%d'),
+}
+TIER_ORDER = ['1m', '1h', '1d']
+
+# A tier is acceptable when it returns at most this many points per pixel
+# column; anything above that is reduced with LTTB
+MAX_OVERSAMPLE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup (
+    tier TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    executions INTEGER NOT NULL DEFAULT 0,
+    successful INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    duration_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (tier, bucket)
+) WITHOUT ROWID;
+"""
+
+
+def bucket_start(moment, tier):
+    """Truncate a datetime to the start of its bucket in the given tier"""
+    if tier == '1m':
+        return moment.replace(second=0, microsecond=0)
+    if tier == '1h':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def lttb(points, threshold, key):
+    """Largest-Triangle-Three-Buckets downsampling on points[i][key]"""
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average point of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        next_range = range(next_start, next_end)
+        avg_x = sum(next_range) / len(next_range)
+        avg_y = sum(points[j][key] for j in next_range) / len(next_range)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = a, points[a][key]
+
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][key] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+class RollupStore:
+    """Per-tier execution/failure/duration aggregates in SQLite"""
+
+    name = 'rollups'
+    source = 'executions'
+
+    def __init__(self, path, retention_days):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA + derived.SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def is_populated(self):
+        db = self._connect()
+        try:
+            return db.execute('SELECT 1 FROM rollup LIMIT 1').fetchone() is not None
+        finally:
+            db.close()
+
+    def record(self, executions):
+        """Fold a batch of replicated execution dicts into every tier"""
+        with self._lock:
+            db = self._connect()
+            try:
+                deltas = {}
+                for execution in derived.begin(db, self.name, self.source, executions):
+                    moment = datetime.strptime(execution['execution_time'], TIME_FORMAT)
+                    status = execution['status']
+                    for tier in TIER_ORDER:
+                        key = (tier, bucket_start(moment, tier).strftime(TIME_FORMAT))
+                        delta = deltas.setdefault(key, [0, 0, 0, 0.0])
+                        delta[0] += 1
+                        delta[1] += status == 'SUCCESS'
+                        delta[2] += status == 'FAILED'
+                        delta[3] += execution['duration_seconds'] or 0
+
+                db.executemany("""
+                    INSERT INTO rollup (tier, bucket, executions, successful, failed, duration_sum)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tier, bucket) DO UPDATE SET
+                        executions = executions + excluded.executions,
+                        successful = successful + excluded.successful,
+                        failed = failed + excluded.failed,
+                        duration_sum = duration_sum + excluded.duration_sum
+                """, [key + tuple(delta) for key, delta in deltas.items()])
+                if deltas:
+                    self._prune(db)
+                db.commit()
+            finally:
+                db.close()
+
+    def _prune(self, db):
+        now = datetime.now()
+        for tier, days in self.retention_days.items():
+            cutoff = (now - timedelta(days=days)).strftime(TIME_FORMAT)
+            db.execute('DELETE FROM rollup WHERE tier = ? AND bucket < ?', (tier, cutoff))
+
+    def choose_tier(self, start, end, width):
+        """Finest tier that still covers start and fits the chart width"""
+        span = (end - start).total_seconds()
+        now = datetime.now()
+        covering = [
+            tier for tier in TIER_ORDER
+            if start >= now - timedelta(days=self.retention_days[tier])
+        ] or [TIER_ORDER[-1]]
+
+        for tier in covering:
+            if span / TIERS[tier][0] <= width * MAX_OVERSAMPLE:
+                return tier
+        return covering[-1]
+
+    def query(self, start, end, width):
+        """Chart points for [start, end), at most `width` of them
+
+        Empty buckets are returned as zeros so LTTB (which uses the point
+        index as x) sees time gaps at their real width
+        """
+        tier = self.choose_tier(start, end, width)
+        label_format = TIERS[tier][1]
+        if tier == '1h' and end - start > timedelta(days=1):
+            label_format = '%m-%d %H:00'
+        first = bucket_start(start, tier)
+
+        db = self._connect()
+        try:
+            rows = db.execute("""
+                SELECT bucket, executions, successful, failed, duration_sum
+                FROM rollup
+                WHERE tier = ? AND bucket >= ? AND bucket < ?
+            """, (tier, first.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT))).fetchall()
+        finally:
+            db.close()
+        buckets = {row['bucket']: row for row in rows}
+
+        points = []
+        step = timedelta(seconds=TIERS[tier][0])
+        moment = first
+        while moment < end:
+            row = buckets.get(moment.strftime(TIME_FORMAT))
+            executions = row['executions'] if row else 0
+            points.append({
+                'time': moment.strftime(TIME_FORMAT),
+                'hour': moment.strftime(label_format),
+                'executions': executions,
+                'successful': row['successful'] if row else 0,
+                'failed': row['failed'] if row else 0,
+                'avg_duration': round(row['duration_sum'] / executions) if executions else 0,
+                'tier': tier
+            })
+            moment += step
+
+        return lttb(points, width, 'executions')
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Streaming Quantile Sketches
+Mergeable DDSketch per procedure and per day for duration and throughput
+percentiles without rescanning the execution log
+"""
+
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import derived
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DAY_FORMAT = '%Y-%m-%d'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS procedure_sketch (
+    procedure_name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (procedure_name, metric, day)
+) WITHOUT ROWID;
+"""
+
+
+class DDSketch:
+    """Quantile sketch with bounded relative error (Masson et al., 2019)"""
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+
+    def _collapse(self):
+        # Fold the lowest bins together; the upper tail keeps full accuracy
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins + 1
+        merged = sum(self.bins.pop(i) for i in indexes[:excess])
+        target = indexes[excess]
+        self.bins[target] = self.bins.get(target, 0) + merged
+
+    def merge(self, other):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_json(self):
+        return json.dumps({
+            'a': self.relative_accuracy,
+            'z': self.zero_count,
+            'n': self.count,
+            'b': self.bins
+        })
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.loads(payload)
+        sketch = cls(data['a'])
+        sketch.zero_count = data['z']
+        sketch.count = data['n']
+        sketch.bins = {int(i): c for i, c in data['b'].items()}
+        return sketch
+
+
+def execution_metrics(execution):
+    """Values each execution contributes: duration and records/s"""
+    duration = execution['duration_seconds'] or 0
+    metrics = {'duration': duration}
+    if duration > 0:
+        metrics['records_per_second'] = (execution['records_processed'] or 0) / duration
+    return metrics
+
+
+class SketchStore:
+    """Per-procedure, per-day sketches persisted next to the replica"""
+
+    name = 'sketches'
+    source = 'executions'
+
+    def __init__(self, path, retention_days=365):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA + derived.SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def is_populated(self):
+        db = self._connect()
+        try:
+            return db.execute('SELECT 1 FROM procedure_sketch LIMIT 1').fetchone() is not None
+        finally:
+            db.close()
+
+    def record(self, executions):
+        """Add a batch of replicated execution dicts to their procedure/day sketches"""
+        with self._lock:
+            db = self._connect()
+            try:
+                updates = {}
+                for execution in derived.begin(db, self.name, self.source, executions):
+                    if execution['status'] == 'FAILED':
+                        continue  # logged with duration 0 and no records
+                    day = datetime.strptime(execution['execution_time'], TIME_FORMAT).strftime(DAY_FORMAT)
+                    for metric, value in execution_metrics(execution).items():
+                        updates.setdefault((execution['procedure_name'], metric, day), []).append(value)
+
+                for key, values in updates.items():
+                    row = db.execute(
+                        'SELECT payload FROM procedure_sketch WHERE procedure_name = ? AND metric = ? AND day = ?',
+                        key
+                    ).fetchone()
+                    sketch = DDSketch.from_json(row[0]) if row else DDSketch()
+                    for value in values:
+                        sketch.add(value)
+                    db.execute(
+                        'INSERT OR REPLACE INTO procedure_sketch VALUES (?, ?, ?, ?)',
+                        (key[0], key[2], key[1], sketch.to_json())
+                    )
+                if updates:
+                    cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+                    db.execute('DELETE FROM procedure_sketch WHERE day < ?', (cutoff,))
+                db.commit()
+            finally:
+                db.close()
+
+    def merged(self, procedure_name, metric, start, end):
+        """One sketch covering [start, end] merged from the daily sketches"""
+        db = self._connect()
+        try:
+            rows = db.execute("""
+                SELECT payload FROM procedure_sketch
+                WHERE procedure_name = ? AND metric = ? AND day BETWEEN ? AND ?
+            """, (procedure_name, metric, start.strftime(DAY_FORMAT), end.strftime(DAY_FORMAT))).fetchall()
+        finally:
+            db.close()
+
+        sketch = DDSketch()
+        for (payload,) in rows:
+            sketch.merge(DDSketch.from_json(payload))
+        return sketch
+
+
+def percentile_fields(duration_sketch, throughput_sketch):
+    """API fields reported for one procedure"""
+
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'p50_duration_seconds': rounded(duration_sketch.quantile(0.50)),
+        'p90_duration_seconds': rounded(duration_sketch.quantile(0.90)),
+        'p99_duration_seconds': rounded(duration_sketch.quantile(0.99)),
+        'p50_records_per_second': rounded(throughput_sketch.quantile(0.50)),
+        'p90_records_per_second': rounded(throughput_sketch.quantile(0.90)),
+        'p99_records_per_second': rounded(throughput_sketch.quantile(0.99)),
+        # Throughput's bad tail is the low end
+        'p10_records_per_second': rounded(throughput_sketch.quantile(0.10)),
+    }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Columnar Staging for Intermediate Reconciliation Tables
+Materializes stages such as SYS_MINSAT or HLR1_MSISDN_MODIFIED once per
+run date as partitioned, dictionary-encoded Parquet, so later steps and
+other interfaces read them with column projection and predicate pushdown
+instead of re-creating Oracle tables
+
+    python3 staging.py materialize SYS_MINSAT HLR1_MSISDN_MODIFIED
+    python3 staging.py list
+"""
+
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import config
+
+# Try to import Arrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+FETCH_ARRAY_SIZE = 50000
+PARTITION_COLUMN = 'MSISDN_PREFIX'
+SUCCESS_MARKER = '_SUCCESS'
+PREVIOUS_SUFFIX = '.previous'
+
+# Same MSISDN normalization the PL/SQL interfaces apply to NUM_APPEL
+MSISDN_DECODE = (
+    "DECODE(SUBSTR(SUBSTR({col}, 4), 1, 1),"
+    "8,SUBSTR({col}, 4),7,SUBSTR({col}, 4),"
+    "3,'0' || SUBSTR({col}, 4),1,'0' || SUBSTR({col}, 4))"
+)
+
+# stage name -> source query, MSISDN column used for partitioning and
+# low-cardinality columns stored dictionary-encoded
+STAGES = {
+    'SYS_MINSAT': {
+        'sql': f"SELECT {MSISDN_DECODE.format(col='D.NUM_APPEL')} AS MSISDN, D.* "
+               "FROM FAFIF.PPS_ABONNE_JOUR_MIGDB D",
+        'msisdn_column': 'MSISDN',
+        'dictionary_columns': [],
+    },
+}
+# HLR{n}_PARAM columns as listed in P1_MAIN_SYS_INTERFACES: the HLR parameters
+# only, without APN rows, so DISTINCT leaves one row per NUM_APPEL
+HLR_PARAM_COLUMNS = (
+    'NUM_APPEL', 'IMSI', 'CFU', 'CFB', 'CFNRY', 'CFNRC', 'SPN', 'CAW', 'HOLD', 'MPTY', 'AOC', 'BAOC',
+    'BOIC', 'BOIEX', 'BAIC', 'BICRO', 'CAT', 'OBO', 'OBI', 'OBR', 'OBOPRI', 'OBOPRE', 'OBSSM', 'OSB1',
+    'OSB2', 'OSB3', 'OSB4', 'OFA', 'PWD', 'ICI', 'OIN', 'TIN', 'CLIP', 'CLIR', 'COLP', 'COLR', 'SOCB',
+    'SOCFU', 'SOCFB', 'SOCFRY', 'SOCFRC', 'SOCLIP', 'SOCLIR', 'SOCOLP', 'TS11', 'TS21', 'TS22', 'TS62',
+    'TSD1', 'BS21', 'BS22', 'BS23', 'BS24', 'BS25', 'BS26', 'BS31', 'BS32', 'BS33', 'BS34', 'DBSG',
+    'TS61', 'CUG', 'REGSER', 'PICI', 'DCF', 'SODCF', 'SOSDCF', 'CAPL', 'OICK', 'TICK', 'NAM', 'TSMO',
+    'REDUND', 'OCSI', 'RSA', 'RM', 'OBP', 'OSMCSI', 'STYPE', 'SCHAR', 'REDMCH', 'GPRCSI', 'BS3G',
+    'CAMEL', 'RBT', 'EMLPP', 'NEMLPP', 'DEMLPP', 'GPRSCSINF', 'MCSINF', 'OCSINF', 'OSMCSINF', 'TCSINF',
+    'TSMCSINF', 'VTCSINF', 'TIFCSINF', 'DCSIST', 'GPRSCSIST', 'MCSIST', 'OCSIST', 'OSMCSIST', 'TCSIST',
+    'TSMCSIST', 'VTCSIST', 'ICS', 'CWNF', 'CHNF', 'CLIPNF', 'CLIRNF', 'ECTNF', 'ARD',
+)
+
+for _hlr in ('HLR1', 'HLR2'):
+    # P6_VOLTE and P7_DATACARD both derive MSISDNs from the HLR dumps
+    STAGES[f'{_hlr}_MSISDN_MODIFIED'] = {
+        'sql': f"SELECT {MSISDN_DECODE.format(col='H.NUM_APPEL')} AS MSISDN_APN1, H.* FROM {_hlr} H",
+        'msisdn_column': 'MSISDN_APN1',
+        'dictionary_columns': ['APN_ID', 'PDP_ID', 'QOS'],
+    }
+    # One row per NUM_APPEL with every HLR parameter (HLR1_PARAM / HLR2_PARAM)
+    _columns = ', '.join(f'T.{c}' for c in HLR_PARAM_COLUMNS + (f'DATE_INSERTION_{_hlr}',))
+    STAGES[f'{_hlr}_PARAM'] = {
+        'sql': f"SELECT DISTINCT {MSISDN_DECODE.format(col='T.NUM_APPEL')} AS MSISDN, {_columns} FROM {_hlr} T",
+        'msisdn_column': 'MSISDN',
+        'dictionary_columns': ['SCHAR', 'BS3G', 'RSA', 'TS11', 'CAT', 'NAM', 'STYPE', 'OCSIST', 'CAMEL'],
+    }
+
+
+def _require_arrow():
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for columnar staging (pip3 install pyarrow)")
+
+
+def stage_path(name, run_date=None):
+    run_date = run_date or datetime.now().strftime('%Y-%m-%d')
+    return os.path.join(config.STAGING_ROOT, name, f'run_date={run_date}')
+
+
+def _restore_previous(target):
+    """Put back a stage moved aside by a swap that stopped before the new one landed"""
+    previous = target + PREVIOUS_SUFFIX
+    if not os.path.exists(target) and os.path.exists(os.path.join(previous, SUCCESS_MARKER)):
+        os.rename(previous, target)
+
+
+def is_materialized(name, run_date=None):
+    target = stage_path(name, run_date)
+    _restore_previous(target)
+    return os.path.exists(os.path.join(target, SUCCESS_MARKER))
+
+
+def _arrow_type(oracle_type, scale):
+    type_name = getattr(oracle_type, 'name', str(oracle_type)).upper()
+    if 'NUMBER' in type_name:
+        return pa.int64() if scale == 0 else pa.float64()
+    if 'BINARY_DOUBLE' in type_name or 'BINARY_FLOAT' in type_name:
+        return pa.float64()
+    if 'DATE' in type_name or 'TIMESTAMP' in type_name:
+        return pa.timestamp('s')
+    return pa.string()
+
+
+def _schema(description, spec):
+    fields = []
+    for name, oracle_type, _, _, _, scale, _ in description:
+        arrow_type = _arrow_type(oracle_type, scale)
+        if name in spec['dictionary_columns'] and arrow_type == pa.string():
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(name, arrow_type))
+    fields.append(pa.field(PARTITION_COLUMN, pa.string()))
+    return pa.schema(fields)
+
+
+def _batches(cursor, schema, spec):
+    """Oracle array fetches -> Arrow record batches with the partition key"""
+    names = schema.names[:-1]
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        arrays = []
+        for i, name in enumerate(names):
+            field_type = schema.field(name).type
+            if pa.types.is_dictionary(field_type):
+                arrays.append(pa.array(columns[i], pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(columns[i], field_type))
+        msisdn = arrays[names.index(spec['msisdn_column'])]
+        arrays.append(pc.fill_null(pc.utf8_slice_codeunits(msisdn, 0, 2), '__'))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _partitioning():
+    # Explicit string type: inferred hive keys would turn '03' into 3
+    return ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+
+
+def materialize_stage(connection, name, run_date=None):
+    """Pull a stage from Oracle once and write it as partitioned Parquet"""
+    _require_arrow()
+    spec = STAGES[name]
+    target = stage_path(name, run_date)
+    staging = f'{target}.tmp-{uuid.uuid4().hex[:8]}'
+
+    cursor = connection.cursor()
+    cursor.arraysize = FETCH_ARRAY_SIZE
+    try:
+        cursor.execute(spec['sql'])
+        schema = _schema(cursor.description, spec)
+        ds.write_dataset(
+            _batches(cursor, schema, spec),
+            staging,
+            schema=schema,
+            format='parquet',
+            partitioning=_partitioning(),
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+            max_rows_per_group=256 * 1024,
+        )
+    finally:
+        cursor.close()
+
+    # Swap by renames only: old stage aside, new stage in, then drop the old
+    # one. Readers never see a half-written stage, and a crash between the
+    # renames leaves the old stage at .previous, restored on the next read
+    open(os.path.join(staging, SUCCESS_MARKER), 'w').close()
+    previous = target + PREVIOUS_SUFFIX
+    _restore_previous(target)
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+    return target
+
+
+def open_stage(name, run_date=None, connection=None):
+    """Dataset for a stage, materializing it first if a connection is given"""
+    _require_arrow()
+    if not is_materialized(name, run_date):
+        if connection is None:
+            raise FileNotFoundError(f"stage {name} not materialized for {run_date or 'today'}")
+        materialize_stage(connection, name, run_date)
+    return ds.dataset(
+        stage_path(name, run_date),
+        format='parquet',
+        partitioning=_partitioning(),
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+        exclude_invalid_files=True,
+    )
+
+
+def read_stage(name, columns=None, filter=None, run_date=None, connection=None):
+    """Projected, filtered read; partitions and row groups are pruned on disk"""
+    return open_stage(name, run_date, connection).to_table(columns=columns, filter=filter)
+
+
+def lookup_msisdns(name, msisdns, columns=None, run_date=None, connection=None):
+    """Rows for a set of MSISDNs, touching only their prefix partitions"""
+    msisdn_column = STAGES[name]['msisdn_column']
+    prefixes = sorted({m[:2] for m in msisdns})
+    predicate = ds.field(PARTITION_COLUMN).isin(prefixes) & ds.field(msisdn_column).isin(list(msisdns))
+    return read_stage(name, columns, predicate, run_date, connection)
+
+
+def prune_stages(retention_days=None):
+    """Drop run dates older than the retention window"""
+    retention_days = retention_days or config.STAGING_RETENTION_DAYS
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+    for name in STAGES:
+        root = os.path.join(config.STAGING_ROOT, name)
+        if not os.path.isdir(root):
+            continue
+        for entry in os.listdir(root):
+            if entry.startswith('run_date=') and entry[len('run_date='):][:10] < cutoff:
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('materialize', 'list'):
+        print(f"Usage: {sys.argv[0]} materialize STAGE [STAGE ...] | list")
+        print(f"Stages: {', '.join(STAGES)}")
+        sys.exit(2)
+
+    if sys.argv[1] == 'list':
+        for name in STAGES:
+            status = '✅ materialized' if is_materialized(name) else '⚪ not materialized'
+            print(f"   {name}: {status} ({stage_path(name)})")
+        sys.exit(0)
+
+    _require_arrow()
+    from db import get_oracle_connection
+    conn = get_oracle_connection()
+    if not conn:
+        print("❌ No database connection (check USE_REAL_DATABASE in config.py)")
+        sys.exit(1)
+
+    try:
+        for name in sys.argv[2:]:
+            started = datetime.now()
+            path = materialize_stage(conn, name)
+            rows = open_stage(name).count_rows()
+            print(f"✅ {name}: {rows:,} rows → {path} ({(datetime.now() - started).total_seconds():.1f}s)")
+    finally:
+        conn.close()
+    prune_stages()
@@ -2,12 +2,62 @@
 """
 Oracle Database Connection Test Script
 Tests connection to Oracle database for HLR Dashboard
+
+    python3 test_db_connection.py             # connection + table checks
+    python3 test_db_connection.py --diagnose  # parallel readiness diagnostics
 """
 
+import argparse
+import math
+import statistics
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import cx_Oracle
 from config import ORACLE_CONFIG
 
+LOG_TABLES = ['RECONCILIATION_EXECUTION_LOG', 'RECONCILIATION_ERRORS']
+HLR_TABLES = ['HLR1', 'HLR2', 'CLEAN_SV_ALL_UPD', 'PPS_ABONNE_JOUR_MIGDB']
+
+DIAGNOSE_POOL_SIZE = 4
+LATENCY_ROUND_TRIPS = 20
+FETCH_TEST_ROWS = 100000
+FETCH_ARRAY_SIZE = 1000
+STALE_STATS_DAYS = 7         # Optimizer stats older than this are flagged
+MAX_READY_LATENCY_MS = 50    # Median round trip above this is flagged
+
+# Row estimate and stats age from the data dictionary instead of COUNT(*);
+# tables owned by the connected user win over same-named ones elsewhere
+TABLE_INFO_QUERY = """
+    SELECT owner, num_rows, last_analyzed
+    FROM all_tables
+    WHERE table_name = :table_name
+    ORDER BY CASE WHEN owner = USER THEN 0 ELSE 1 END
+"""
+
+def make_dsn():
+    return cx_Oracle.makedsn(
+        ORACLE_CONFIG['host'],
+        ORACLE_CONFIG['port'],
+        service_name=ORACLE_CONFIG['service_name']
+    )
+
+def table_info(cursor, table):
+    """(exists, owner, estimated rows, last analyzed) for one table"""
+    cursor.execute(TABLE_INFO_QUERY, table_name=table)
+    row = cursor.fetchone()
+    if not row:
+        return False, None, None, None
+    owner, num_rows, last_analyzed = row
+    return True, owner, num_rows, last_analyzed
+
+def describe_estimate(num_rows, last_analyzed):
+    if num_rows is None:
+        return "no optimizer stats"
+    analyzed = last_analyzed.strftime('%Y-%m-%d %H:%M') if last_analyzed else 'never'
+    return f"~{num_rows:,} rows (analyzed {analyzed})"
+
 def test_connection():
     """Test Oracle database connection"""
 
@@ -27,11 +77,7 @@ def test_connection():
 
     try:
         # Create DSN
-        dsn = cx_Oracle.makedsn(
-            ORACLE_CONFIG['host'],
-            ORACLE_CONFIG['port'],
-            service_name=ORACLE_CONFIG['service_name']
-        )
+        dsn = make_dsn()
 
         print(f"   DSN: {dsn}")
 
@@ -56,39 +102,21 @@ def test_connection():
         # 2. Check if reconciliation tables exist
         print("\n📁 Checking for reconciliation tables...")
 
-        tables_to_check = [
-            'RECONCILIATION_EXECUTION_LOG',
-            'RECONCILIATION_ERRORS'
-        ]
-
-        for table in tables_to_check:
-            cursor.execute(f"""
-                SELECT COUNT(*)
-                FROM user_tables
-                WHERE table_name = '{table}'
-            """)
-            exists = cursor.fetchone()[0]
-
+        for table in LOG_TABLES:
+            exists, owner, num_rows, last_analyzed = table_info(cursor, table)
             if exists:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                print(f"   ✅ {table}: {count} records")
+                print(f"   ✅ {owner}.{table}: {describe_estimate(num_rows, last_analyzed)}")
             else:
                 print(f"   ❌ {table}: NOT FOUND (needs to be created)")
 
         # 3. Check HLR tables
         print("\n📁 Checking for HLR source tables...")
 
-        hlr_tables = ['HLR1', 'HLR2', 'CLEAN_SV_ALL_UPD', 'PPS_ABONNE_JOUR_MIGDB']
-
-        for table in hlr_tables:
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE ROWNUM <= 1")
-                exists = True
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                print(f"   ✅ {table}: {count} records")
-            except cx_Oracle.DatabaseError:
+        for table in HLR_TABLES:
+            exists, owner, num_rows, last_analyzed = table_info(cursor, table)
+            if exists:
+                print(f"   ✅ {owner}.{table}: {describe_estimate(num_rows, last_analyzed)}")
+            else:
                 print(f"   ❌ {table}: NOT FOUND")
 
         cursor.close()
@@ -146,6 +174,151 @@ def test_connection():
         print(f"   Type: {type(e).__name__}")
         return False
 
+def _check_table(pool, table):
+    connection = pool.acquire()
+    try:
+        cursor = connection.cursor()
+        return (table,) + table_info(cursor, table)
+    finally:
+        pool.release(connection)
+
+def _measure_latency(pool):
+    """Round-trip times in milliseconds for a trivial query"""
+    connection = pool.acquire()
+    try:
+        cursor = connection.cursor()
+        timings = []
+        for _ in range(LATENCY_ROUND_TRIPS):
+            started = time.perf_counter()
+            cursor.execute("SELECT 1 FROM DUAL")
+            cursor.fetchone()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+    finally:
+        pool.release(connection)
+
+def _measure_fetch_throughput(pool):
+    """Rows/s for an array fetch of generated rows (no table I/O)"""
+    connection = pool.acquire()
+    try:
+        cursor = connection.cursor()
+        cursor.arraysize = FETCH_ARRAY_SIZE
+        started = time.perf_counter()
+        cursor.execute("SELECT LEVEL, RPAD('x', 30, 'x') FROM DUAL CONNECT BY LEVEL <= :n", n=FETCH_TEST_ROWS)
+        rows = 0
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            rows += len(batch)
+        return rows / (time.perf_counter() - started)
+    finally:
+        pool.release(connection)
+
+def nearest_rank(values, q):
+    """Nearest-rank percentile: smallest value with at least q of the sample at or below it"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)), 1) - 1]
+
+def _describe_failure(e):
+    if isinstance(e, cx_Oracle.DatabaseError):
+        error, = e.args
+        return error.message.strip()
+    return f"{type(e).__name__}: {e}"
+
+def run_diagnostics():
+    """Check all tables concurrently and report whether a run can start"""
+    print("=" * 60)
+    print("🩺 Oracle Readiness Diagnostics")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    problems = []
+    warnings = []
+
+    try:
+        pool = cx_Oracle.SessionPool(
+            ORACLE_CONFIG['username'],
+            ORACLE_CONFIG['password'],
+            make_dsn(),
+            min=1, max=DIAGNOSE_POOL_SIZE, increment=1, threaded=True
+        )
+    except cx_Oracle.DatabaseError as e:
+        error, = e.args
+        print(f"\n❌ Connection failed: ORA-{error.code:05d} {error.message}")
+        print(f"\n⏱️  Finished in {time.perf_counter() - started:.2f}s — NOT READY")
+        return False
+
+    connected = time.perf_counter() - started
+    print(f"\n🔌 Pool of {DIAGNOSE_POOL_SIZE} sessions ready in {connected:.2f}s")
+
+    try:
+        with ThreadPoolExecutor(max_workers=DIAGNOSE_POOL_SIZE) as executor:
+            tables = LOG_TABLES + HLR_TABLES
+            table_futures = [executor.submit(_check_table, pool, t) for t in tables]
+            latency_future = executor.submit(_measure_latency, pool)
+            fetch_future = executor.submit(_measure_fetch_throughput, pool)
+
+            # One failing probe is reported as a problem; the rest still run
+            print("\n📁 Tables (data dictionary estimates):")
+            now = datetime.now()
+            for table, future in zip(tables, table_futures):
+                try:
+                    table, exists, owner, num_rows, last_analyzed = future.result()
+                except Exception as e:
+                    print(f"   ❌ {table}: {_describe_failure(e)}")
+                    problems.append(f"{table} check failed")
+                    continue
+                if not exists:
+                    print(f"   ❌ {table}: NOT FOUND")
+                    problems.append(f"{table} missing")
+                    continue
+
+                print(f"   ✅ {owner}.{table}: {describe_estimate(num_rows, last_analyzed)}")
+                if table in HLR_TABLES and num_rows == 0:
+                    problems.append(f"{table} is empty")
+                if last_analyzed is None or (now - last_analyzed).days > STALE_STATS_DAYS:
+                    warnings.append(f"{table} stats older than {STALE_STATS_DAYS} days")
+
+            try:
+                timings = latency_future.result()
+                median = statistics.median(timings)
+                p95 = nearest_rank(timings, 0.95)
+                print(f"\n📡 Round trip: median {median:.1f} ms | p95 {p95:.1f} ms ({LATENCY_ROUND_TRIPS} queries)")
+                if median > MAX_READY_LATENCY_MS:
+                    warnings.append(f"median latency {median:.0f} ms above {MAX_READY_LATENCY_MS} ms")
+            except Exception as e:
+                print(f"\n📡 Round trip: ❌ {_describe_failure(e)}")
+                problems.append("latency probe failed")
+
+            try:
+                rows_per_second = fetch_future.result()
+                print(f"🚚 Array fetch: {rows_per_second:,.0f} rows/s (arraysize {FETCH_ARRAY_SIZE})")
+            except Exception as e:
+                print(f"🚚 Array fetch: ❌ {_describe_failure(e)}")
+                warnings.append("fetch throughput probe failed")
+    finally:
+        pool.close()
+
+    elapsed = time.perf_counter() - started
+    ready = not problems
+
+    print("\n" + "=" * 60)
+    for problem in problems:
+        print(f"   ❌ {problem}")
+    for warning in warnings:
+        print(f"   ⚠️  {warning}")
+    verdict = "✅ READY for a reconciliation run" if ready else "❌ NOT READY"
+    print(f"⏱️  Finished in {elapsed:.2f}s — {verdict}")
+    print("=" * 60)
+
+    return ready
+
 if __name__ == '__main__':
-    success = test_connection()
+    parser = argparse.ArgumentParser(description='Test the Oracle connection used by the HLR dashboard')
+    parser.add_argument('--diagnose', action='store_true',
+                        help='parallel readiness check using dictionary estimates instead of COUNT(*)')
+    args = parser.parse_args()
+
+    success = run_diagnostics() if args.diagnose else test_connection()
     sys.exit(0 if success else 1)
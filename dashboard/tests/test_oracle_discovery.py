@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Tests for oracle_discovery: tnsnames.ora parsing and TNS probing against
+local fake listeners
+
+    cd dashboard && python3 -m unittest discover -s tests
+"""
+
+import asyncio
+import os
+import socket
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import oracle_discovery  # noqa: E402
+
+
+def tns_packet(packet_type, text=''):
+    data = text.encode('ascii')
+    return struct.pack('>HHBBH', oracle_discovery.TNS_HEADER_SIZE + len(data), 0, packet_type, 0, 0) + data
+
+
+class ParseTnsnamesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_multi_alias_entry(self):
+        path = self.write('tnsnames.ora', """
+# production
+RECON_GEOX, RECON =
+  (DESCRIPTION =
+    (ADDRESS_LIST =
+      (ADDRESS = (PROTOCOL = TCP)(HOST = db1.alfa.local)(PORT = 1521))
+      (ADDRESS = (PROTOCOL = TCP)(HOST = db2.alfa.local)(PORT = 1526))
+    )
+    (CONNECT_DATA = (SERVICE_NAME = RECON_GEOX))
+  )
+""")
+        entries = oracle_discovery.parse_tnsnames(path)
+
+        self.assertEqual(sorted(entries), ['RECON', 'RECON_GEOX'])
+        entry = entries['RECON_GEOX']
+        self.assertIs(entries['RECON'], entry)
+        self.assertEqual(entry['addresses'], [('db1.alfa.local', 1521), ('db2.alfa.local', 1526)])
+        self.assertEqual(entry['service_name'], 'RECON_GEOX')
+        self.assertIsNone(entry['sid'])
+        self.assertEqual(entry['source'], path)
+
+    def test_default_port_and_sid(self):
+        path = self.write('tnsnames.ora', """
+legacy = (DESCRIPTION = (ADDRESS = (PROTOCOL = TCP)(HOST = 10.0.0.5))
+                        (CONNECT_DATA = (SID = ORCL)))
+""")
+        entry = oracle_discovery.parse_tnsnames(path)['LEGACY']
+        self.assertEqual(entry['addresses'], [('10.0.0.5', 1521)])
+        self.assertEqual(entry['sid'], 'ORCL')
+
+    def test_ifile_relative_and_cyclic(self):
+        self.write('extra.ora', """
+IFILE = tnsnames.ora
+BOPS = (DESCRIPTION = (ADDRESS = (HOST = bops.alfa.local)(PORT = 2483))
+                      (CONNECT_DATA = (SERVICE_NAME = BOPS)))
+""")
+        path = self.write('tnsnames.ora', """
+IFILE = extra.ora
+RECON = (DESCRIPTION = (ADDRESS = (HOST = db1.alfa.local)(PORT = 1521))
+                       (CONNECT_DATA = (SERVICE_NAME = RECON_GEOX)))
+""")
+        entries = oracle_discovery.parse_tnsnames(path)
+
+        self.assertEqual(sorted(entries), ['BOPS', 'RECON'])
+        self.assertEqual(entries['BOPS']['addresses'], [('bops.alfa.local', 2483)])
+        self.assertEqual(entries['BOPS']['source'], os.path.join(self.tmp.name, 'extra.ora'))
+
+    def test_alias_with_domain_suffix(self):
+        path = self.write('tnsnames.ora', """
+recon_geox.world = (DESCRIPTION = (ADDRESS = (HOST = db1)(PORT = 1521)))
+RECON_GEOX_DR = (DESCRIPTION = (ADDRESS = (HOST = dr1)(PORT = 1521)))
+""")
+        entries = oracle_discovery.find_alias(oracle_discovery.parse_tnsnames(path), 'RECON_GEOX')
+
+        self.assertEqual(list(entries), ['RECON_GEOX.WORLD'])
+        self.assertEqual(entries['RECON_GEOX.WORLD']['addresses'], [('db1', 1521)])
+
+    def test_missing_ifile_and_truncated_entry(self):
+        path = self.write('tnsnames.ora', """
+IFILE = /nonexistent/tnsnames.ora
+GOOD = (DESCRIPTION = (ADDRESS = (HOST = h)(PORT = 1521)))
+BROKEN = (DESCRIPTION = (ADDRESS = (HOST = h2)(PORT =
+""")
+        entries = oracle_discovery.parse_tnsnames(path)
+        self.assertEqual(list(entries), ['GOOD'])
+
+
+class ProbeTest(unittest.TestCase):
+    """probe() against asyncio servers that speak just enough TNS"""
+
+    def run_probe(self, handler, timeout=0.5, service_name='RECON_GEOX'):
+        async def main():
+            server = await asyncio.start_server(handler, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await oracle_discovery.probe('127.0.0.1', port, timeout, service_name)
+        return asyncio.run(main())
+
+    @staticmethod
+    def replying(packet):
+        async def handler(reader, writer):
+            await reader.read(1024)  # the CONNECT packet
+            writer.write(packet)
+            await writer.drain()
+            writer.close()
+        return handler
+
+    def test_accept(self):
+        result = self.run_probe(self.replying(tns_packet(oracle_discovery.TNS_ACCEPT, '\x01\x3a')))
+
+        self.assertTrue(result['open'])
+        self.assertTrue(result['oracle'])
+        self.assertEqual(result['packet_type'], 'ACCEPT')
+        self.assertTrue(result['service_known'])
+        self.assertIn('latency_ms', result)
+
+    def test_refuse_unknown_service(self):
+        text = '(DESCRIPTION=(TMP=)(VSNNUM=186647040)(ERR=12514)(ERROR_STACK=(ERROR=(CODE=12514)(EMFI=4))))'
+        result = self.run_probe(self.replying(tns_packet(oracle_discovery.TNS_REFUSE, text)))
+
+        self.assertTrue(result['oracle'])
+        self.assertEqual(result['packet_type'], 'REFUSE')
+        self.assertEqual(result['error_code'], 12514)
+        self.assertFalse(result['service_known'])
+        self.assertEqual(result['version'], '11.2.0.2.0')
+
+    def test_connect_packet_is_well_formed(self):
+        received = []
+
+        async def handler(reader, writer):
+            header = await reader.readexactly(oracle_discovery.TNS_HEADER_SIZE)
+            length, _, packet_type, _, _ = struct.unpack('>HHBBH', header)
+            received.append((packet_type, await reader.readexactly(length - len(header))))
+            writer.write(tns_packet(oracle_discovery.TNS_ACCEPT))
+            await writer.drain()
+            writer.close()
+
+        self.run_probe(handler)
+        packet_type, body = received[0]
+        self.assertEqual(packet_type, oracle_discovery.TNS_CONNECT)
+        self.assertIn(b'(SERVICE_NAME=RECON_GEOX)', body)
+
+    def test_timeout_on_silent_listener(self):
+        async def silent(reader, writer):
+            await asyncio.sleep(2)
+            writer.close()
+
+        result = self.run_probe(silent, timeout=0.2)
+
+        self.assertTrue(result['open'])
+        self.assertFalse(result['oracle'])
+        self.assertEqual(result['error'], 'TimeoutError')
+
+    def test_non_tns_service(self):
+        result = self.run_probe(self.replying(b'SSH-2.0-OpenSSH_8.9\r\n'))
+
+        self.assertTrue(result['open'])
+        self.assertFalse(result['oracle'])
+
+    def test_closed_port(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]  # nothing listens once the socket closes
+        result = asyncio.run(oracle_discovery.probe('127.0.0.1', port, 0.5))
+
+        self.assertFalse(result['open'])
+        self.assertFalse(result['oracle'])
+        self.assertNotIn('error', result)
+
+    def test_scan_bounds_concurrency(self):
+        active, peak = [0], [0]
+
+        async def handler(reader, writer):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await reader.read(1024)
+            await asyncio.sleep(0.05)
+            writer.write(tns_packet(oracle_discovery.TNS_ACCEPT))
+            await writer.drain()
+            writer.close()
+            active[0] -= 1
+
+        async def main():
+            server = await asyncio.start_server(handler, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await oracle_discovery.scan([('127.0.0.1', port)] * 8, concurrency=3, timeout=1.0)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(r['oracle'] for r in results))
+        self.assertLessEqual(peak[0], 3)
+
+    def test_scan_creates_probes_lazily(self):
+        finished, outstanding = [0], []
+
+        async def fake_probe(host, port, timeout, service_name):
+            await asyncio.sleep(0.01)
+            finished[0] += 1
+            return {'host': host, 'port': port, 'open': False, 'oracle': False}
+
+        def pairs():
+            for i in range(50):
+                outstanding.append(i - finished[0])  # probes created, not yet done
+                yield (f'10.0.0.{i}', 1521)
+
+        with mock.patch.object(oracle_discovery, 'probe', fake_probe):
+            results = asyncio.run(oracle_discovery.scan(pairs(), concurrency=4))
+
+        self.assertEqual([r['host'] for r in results], [f'10.0.0.{i}' for i in range(50)])
+        self.assertLessEqual(max(outstanding), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for transfer: chunked resume and checksum verification over the
+local directory transport
+
+    cd dashboard && python3 -m unittest discover -s tests
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import transfer  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FlakyTransport(transfer.LocalTransport):
+    """Local transport whose sessions misbehave at chosen offsets"""
+
+    def __init__(self, path, compression_level=0, fail_at=None, corrupt_at=None, ftp=False):
+        super().__init__(path, compression_level)
+        self.fail_at = fail_at          # write at this offset raises once
+        self.corrupt_at = corrupt_at    # write at this offset lands with a flipped byte, once
+        self.ftp = ftp                  # truncate like FtpSession: delete only
+        self.writes = []
+
+    def session(self):
+        return FlakySession(self)
+
+
+class FlakySession(transfer.LocalSession):
+    def __init__(self, transport):
+        super().__init__(transport.path)
+        self.transport = transport
+
+    def write(self, name, offset, data):
+        t = self.transport
+        if name.endswith(transfer.PARTIAL_SUFFIX):
+            if offset == t.fail_at:
+                t.fail_at = None
+                raise ConnectionResetError('connection dropped')
+            t.writes.append(offset)
+            if offset == t.corrupt_at:
+                t.corrupt_at = None
+                data = bytes([data[0] ^ 0xFF]) + data[1:]
+        super().write(name, offset, data)
+
+    def truncate(self, name, size):
+        if self.transport.ftp and size and name.endswith(transfer.PARTIAL_SUFFIX):
+            raise transfer.TransferError('FTP cannot truncate a partial file')
+        super().truncate(name, size)
+
+
+class FakeFtp:
+    """Records the REST offset of every STOR"""
+
+    def __init__(self):
+        self.stores = []
+
+    def storbinary(self, cmd, fp, blocksize=8192, callback=None, rest=None):
+        self.stores.append((cmd, rest, fp.read()))
+
+
+class TransferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, 'reconciliation_19102026.csv')
+        # Not all-repeating, so compressed chunks differ in size
+        with open(self.source, 'wb') as f:
+            f.write(b''.join(f'9613{i:07d},{i * 7919 % 100003},Alfa Active\n'.encode()
+                             for i in range(20000)))
+        self.dest = os.path.join(self.tmp.name, 'dest')
+        self.settings = {
+            'remote_name': '{stem}.txt',
+            'streams': 2,
+            'chunk_size': CHUNK_SIZE,
+            'retries': 1,
+            'state_dir': os.path.join(self.tmp.name, 'state'),
+        }
+
+    def source_bytes(self):
+        with open(self.source, 'rb') as f:
+            return f.read()
+
+    def remote_bytes(self, name):
+        with open(os.path.join(self.dest, name), 'rb') as f:
+            return f.read()
+
+    def test_plain_transfer_keeps_p_ftp_name(self):
+        report = transfer.transfer_file(self.source, transfer.LocalTransport(self.dest), self.settings)
+
+        self.assertEqual(report['remote'], 'reconciliation_19102026.txt')
+        self.assertEqual(self.remote_bytes('reconciliation_19102026.txt'), self.source_bytes())
+        self.assertEqual(report['wire_bytes'], report['bytes'])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'reconciliation_19102026.txt.partial')))
+        manifest = json.loads(self.remote_bytes('reconciliation_19102026.txt' + transfer.MANIFEST_SUFFIX))
+        self.assertIsNone(manifest['compression'])
+        self.assertEqual(len(manifest['chunks']), report['chunks'])
+
+    def test_resume_after_dropped_connection(self):
+        chunks = -(-os.path.getsize(self.source) // CHUNK_SIZE)
+        self.assertGreater(chunks, 4)
+        fail_at = 3 * CHUNK_SIZE
+        transport = FlakyTransport(self.dest, fail_at=fail_at)
+
+        with self.assertRaises(transfer.TransferError):
+            transfer.transfer_file(self.source, transport, self.settings)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'reconciliation_19102026.txt')))
+
+        transport.writes.clear()
+        report = transfer.transfer_file(self.source, transport, self.settings)
+
+        # Windows before the failed one are not sent again
+        self.assertEqual(report['chunks_resumed'], 2)
+        self.assertNotIn(0, transport.writes)
+        self.assertIn(fail_at, transport.writes)
+        self.assertEqual(self.remote_bytes('reconciliation_19102026.txt'), self.source_bytes())
+
+        again = transfer.transfer_file(self.source, transport, self.settings)
+        self.assertTrue(again['skipped'])
+
+    def test_resume_over_ftp_keeps_chunks_before_a_landed_tail(self):
+        # Chunk 2 fails while chunk 3 of the same window lands: the partial
+        # is longer than the saved chunks and FTP cannot cut it back
+        fail_at = 2 * CHUNK_SIZE
+        transport = FlakyTransport(self.dest, fail_at=fail_at, ftp=True)
+
+        with self.assertRaises(transfer.TransferError):
+            transfer.transfer_file(self.source, transport, self.settings)
+        partial = os.path.join(self.dest, 'reconciliation_19102026.txt' + transfer.PARTIAL_SUFFIX)
+        self.assertGreater(os.path.getsize(partial), fail_at)
+
+        transport.writes.clear()
+        report = transfer.transfer_file(self.source, transport, self.settings)
+
+        self.assertEqual(report['chunks_resumed'], 2)
+        self.assertEqual(min(transport.writes), fail_at)
+        self.assertEqual(self.remote_bytes('reconciliation_19102026.txt'), self.source_bytes())
+
+    def test_ftp_write_always_sends_rest(self):
+        session = transfer.FtpSession(None)
+        session.ftp = FakeFtp()
+
+        session.write('f.partial', 0, b'first')
+        session.write('f.partial', 5, b'second')
+
+        self.assertEqual([(cmd, rest) for cmd, rest, _ in session.ftp.stores],
+                         [('STOR f.partial', 0), ('STOR f.partial', 5)])
+
+    def test_resume_with_compression(self):
+        transport = FlakyTransport(self.dest, compression_level=6)
+        # Fail the first write of the second window, wherever it lands
+        first = transfer.encode_chunk(self.source_bytes()[:CHUNK_SIZE], 6)[0]
+        second = transfer.encode_chunk(self.source_bytes()[CHUNK_SIZE:2 * CHUNK_SIZE], 6)[0]
+        transport.fail_at = len(first) + len(second)
+
+        with self.assertRaises(transfer.TransferError):
+            transfer.transfer_file(self.source, transport, self.settings)
+        report = transfer.transfer_file(self.source, transport, self.settings)
+
+        self.assertEqual(report['remote'], 'reconciliation_19102026.txt.gz')
+        self.assertEqual(report['chunks_resumed'], 2)
+        self.assertLess(report['wire_bytes'], report['bytes'])
+        self.assertEqual(gzip.decompress(self.remote_bytes('reconciliation_19102026.txt.gz')),
+                         self.source_bytes())
+
+    def test_checksum_mismatch_resends_the_chunk(self):
+        corrupt_at = 2 * CHUNK_SIZE
+        transport = FlakyTransport(self.dest, corrupt_at=corrupt_at)
+
+        with self.assertRaisesRegex(transfer.TransferError, 'checksum mismatch in chunk 2'):
+            transfer.transfer_file(self.source, transport, self.settings)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'reconciliation_19102026.txt')))
+
+        transport.writes.clear()
+        report = transfer.transfer_file(self.source, transport, self.settings)
+
+        # Only the bad chunk goes over the wire again
+        self.assertEqual(transport.writes, [corrupt_at])
+        self.assertEqual(report['chunks_resumed'], report['chunks'] - 1)
+        self.assertEqual(self.remote_bytes('reconciliation_19102026.txt'), self.source_bytes())
+
+    def test_changed_source_starts_over(self):
+        transport = FlakyTransport(self.dest, fail_at=3 * CHUNK_SIZE)
+        with self.assertRaises(transfer.TransferError):
+            transfer.transfer_file(self.source, transport, self.settings)
+
+        with open(self.source, 'ab') as f:
+            f.write(b'96170000000,1,Alfa Classic\n')
+        os.utime(self.source, (1, 1))
+        report = transfer.transfer_file(self.source, transport, self.settings)
+
+        self.assertEqual(report['chunks_resumed'], 0)
+        self.assertEqual(self.remote_bytes('reconciliation_19102026.txt'), self.source_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Output File Transfer
+Python successor of UTL_FILE.FCOPY('OUTPUT', ..., 'OUTPUT_BOPS', ...) +
+DBAUSER.P_FTP: reads result files straight from the OUTPUT directory,
+optionally compresses them chunk by chunk (each chunk is a gzip member, so
+the concatenation is a regular .gz file) and writes the chunks at their
+offsets over several parallel streams. Per-chunk SHA-256 and offsets are kept in a
+local state file, so an interrupted transfer resumes at the first chunk that
+did not complete.
+
+    python3 transfer.py                          # today's files from TRANSFER['source_dir']
+    python3 transfer.py /path/reconciliation_19102026.csv
+    python3 transfer.py --dest /tmp/loopback FILE   # local directory transport
+    python3 transfer.py --dest /tmp/loopback --compress 6 FILE
+"""
+
+import argparse
+import fnmatch
+import ftplib
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config
+
+PARTIAL_SUFFIX = '.partial'
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+class TransferError(Exception):
+    """A file could not be transferred or failed verification"""
+
+
+# ----------------------------------------------------------------------
+# Transports
+# ----------------------------------------------------------------------
+
+class LocalTransport:
+    """Directory on a local or mounted filesystem (also the loopback for tests)"""
+
+    def __init__(self, path, compression_level=0, readback=True):
+        self.path = path
+        self.compression_level = compression_level
+        self.readback = readback
+        os.makedirs(path, exist_ok=True)
+
+    def session(self):
+        return LocalSession(self.path)
+
+
+class LocalSession:
+    def __init__(self, root):
+        self.root = root
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, offset, data):
+        fd = os.open(self._path(name), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, data, offset)
+        finally:
+            os.close(fd)
+
+    def read(self, name, offset, length):
+        with open(self._path(name), 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def size(self, name):
+        try:
+            return os.path.getsize(self._path(name))
+        except OSError:
+            return None
+
+    def truncate(self, name, size):
+        os.truncate(self._path(name), size)
+
+    def rename(self, source, target):
+        os.replace(self._path(source), self._path(target))
+
+    def put(self, name, data):
+        self.write(name, 0, data)
+        self.truncate(name, len(data))
+
+
+class FtpTransport:
+    """FTP server; every STOR is preceded by REST (ProFTPD: AllowStoreRestart on)"""
+
+    def __init__(self, host, username, password, remote_dir='.', port=21, timeout=60,
+                 compression_level=0, readback=False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.remote_dir = remote_dir
+        self.timeout = timeout
+        self.compression_level = compression_level
+        # Off by default: reading every chunk back doubles the traffic, and
+        # the remote size is verified either way
+        self.readback = readback
+
+    def session(self):
+        return FtpSession(self)
+
+
+class FtpSession:
+    def __init__(self, transport):
+        self.transport = transport
+        self.ftp = None
+
+    def __enter__(self):
+        t = self.transport
+        self.ftp = ftplib.FTP(timeout=t.timeout)
+        self.ftp.connect(t.host, t.port)
+        self.ftp.login(t.username, t.password)
+        self.ftp.cwd(t.remote_dir)
+        self.ftp.voidcmd('TYPE I')
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.ftp.quit()
+        except Exception:
+            self.ftp.close()
+        return False
+
+    def write(self, name, offset, data):
+        # REST 0 as well: a plain STOR would truncate the chunks already there
+        self.ftp.storbinary(f'STOR {name}', io.BytesIO(data), blocksize=256 * 1024, rest=offset)
+
+    def read(self, name, offset, length):
+        """RETR from `offset` (REST), closing the data connection after `length` bytes"""
+        conn = self.ftp.transfercmd(f'RETR {name}', rest=offset or None)
+        data = bytearray()
+        try:
+            while len(data) < length:
+                block = conn.recv(min(length - len(data), 256 * 1024))
+                if not block:
+                    break
+                data += block
+        finally:
+            conn.close()
+        try:
+            self.ftp.voidresp()
+        except (ftplib.error_temp, ftplib.error_reply):
+            pass  # 426/451: the server noticed the early close
+        return bytes(data)
+
+    def size(self, name):
+        try:
+            return self.ftp.size(name)
+        except ftplib.error_perm:
+            return None
+
+    def truncate(self, name, size):
+        if size == 0:
+            self.ftp.delete(name)
+        else:
+            raise TransferError('FTP cannot truncate a partial file')
+
+    def rename(self, source, target):
+        if self.size(target) is not None:
+            self.ftp.delete(target)
+        self.ftp.rename(source, target)
+
+    def put(self, name, data):
+        self.ftp.storbinary(f'STOR {name}', io.BytesIO(data))
+
+
+def make_transport(spec):
+    spec = dict(spec)
+    kind = spec.pop('type')
+    if kind == 'local':
+        return LocalTransport(**spec)
+    if kind == 'ftp':
+        return FtpTransport(**spec)
+    raise ValueError(f"unknown transport type {kind!r}")
+
+
+# ----------------------------------------------------------------------
+# Chunking, state and transfer
+# ----------------------------------------------------------------------
+
+def encode_chunk(data, level):
+    """One gzip member per chunk; mtime=0 keeps the output reproducible for resume"""
+    if level:
+        data = gzip.compress(data, compresslevel=level, mtime=0)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def remote_name(path, settings, compression_level=0):
+    """TRANSFER['remote_name'] with {name}, {stem} and {ext}; '.gz' when compressed"""
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    target = settings.get('remote_name', '{name}').format(name=name, stem=stem, ext=ext)
+    return target + ('.gz' if compression_level else '')
+
+
+def _state_path(path, settings):
+    return os.path.join(settings['state_dir'], os.path.basename(path) + '.json')
+
+
+def load_state(path, stat, settings, compression_level=0):
+    """Saved chunk table, if it belongs to this exact file version and settings"""
+    fingerprint = {
+        'size': stat.st_size,
+        'mtime': int(stat.st_mtime),
+        'chunk_size': settings['chunk_size'],
+        'compression_level': compression_level,
+    }
+    state_path = _state_path(path, settings)
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state.get('fingerprint') == fingerprint:
+            return state
+    return {'fingerprint': fingerprint, 'chunks': {}, 'complete': False}
+
+
+def save_state(path, state, settings):
+    os.makedirs(settings['state_dir'], exist_ok=True)
+    state_path = _state_path(path, settings)
+    tmp = state_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+
+
+def _retry(attempts, action, *args):
+    for attempt in range(1, attempts + 1):
+        try:
+            return action(*args)
+        except Exception as e:
+            if attempt == attempts:
+                raise TransferError(f"{e} (after {attempts} attempts)") from e
+            time.sleep(min(2 ** attempt, 30))
+
+
+def transfer_file(path, transport, settings=None, force=False):
+    """Send one file; returns a throughput report"""
+    settings = settings or config.TRANSFER
+    started = time.perf_counter()
+    stat = os.stat(path)
+    level = transport.compression_level
+    state = load_state(path, stat, settings, level)
+    target = remote_name(path, settings, level)
+    partial = target + PARTIAL_SUFFIX
+    chunk_size = settings['chunk_size']
+    streams = settings['streams']
+    chunk_count = max((stat.st_size + chunk_size - 1) // chunk_size, 1)
+
+    if state['complete'] and not force:
+        return dict(state['report'], skipped=True)
+    if force:
+        state = dict(state, chunks={}, complete=False)
+
+    # Resume only if the remote partial file still covers the completed chunks.
+    # Bytes past them (an unfinished window) are left alone: chunks encode
+    # the same way every time, so the resent chunks overwrite them in place
+    with transport.session() as session:
+        done = state['chunks']
+        size = session.size(partial)
+        if done and (size or 0) < max(c['offset'] + c['size'] for c in done.values()):
+            done.clear()
+        if not done and size is not None:
+            session.truncate(partial, 0)
+    resumed = len(state['chunks'])
+
+    # Each stream keeps its own connection for the whole transfer
+    local = threading.local()
+    sessions = []
+
+    def stream_session():
+        if not hasattr(local, 'session'):
+            local.session = transport.session().__enter__()
+            sessions.append(local.session)
+        return local.session
+
+    def upload(chunk):
+        def attempt():
+            try:
+                stream_session().write(partial, chunk['offset'], chunk['data'])
+            except Exception:
+                # Drop the broken connection; the retry opens a new one
+                if hasattr(local, 'session'):
+                    sessions.remove(local.session)
+                    del local.session
+                raise
+        _retry(settings['retries'], attempt)
+
+    def read_and_encode(index):
+        with open(path, 'rb') as f:
+            f.seek(index * chunk_size)
+            return encode_chunk(f.read(chunk_size), level)
+
+    wire_bytes = 0
+    offset = 0
+    try:
+        with ThreadPoolExecutor(max_workers=streams) as pool:
+            # Windows of `streams` chunks keep memory at streams x chunk_size;
+            # gzip and socket writes release the GIL, so both run in parallel
+            for window_start in range(0, chunk_count, streams):
+                window = range(window_start, min(window_start + streams, chunk_count))
+                todo = [i for i in window if str(i) not in state['chunks']]
+                encoded = dict(zip(todo, pool.map(read_and_encode, todo)))
+
+                batch = []
+                for i in window:
+                    if str(i) in state['chunks']:
+                        offset = state['chunks'][str(i)]['offset'] + state['chunks'][str(i)]['size']
+                        continue
+                    data, digest = encoded[i]
+                    batch.append({'index': i, 'offset': offset, 'size': len(data), 'sha256': digest, 'data': data})
+                    offset += len(data)
+
+                # Chunk 0 goes first: a server that ignores REST 0 truncates on it
+                if batch and batch[0]['index'] == 0:
+                    upload(batch[0])
+                    list(pool.map(upload, batch[1:]))
+                else:
+                    list(pool.map(upload, batch))
+                for chunk in batch:
+                    state['chunks'][str(chunk['index'])] = {k: chunk[k] for k in ('offset', 'size', 'sha256')}
+                    wire_bytes += chunk['size']
+                save_state(path, state, settings)
+    finally:
+        for session in sessions:
+            session.__exit__(None, None, None)
+
+    chunks = [state['chunks'][str(i)] for i in range(chunk_count)]
+    total_size = offset
+    with transport.session() as session:
+        remote_size = session.size(partial)
+        if remote_size != total_size:
+            raise TransferError(f"{partial}: remote size {remote_size} != {total_size}")
+        if transport.readback:
+            for i, chunk in enumerate(chunks):
+                data = session.read(partial, chunk['offset'], chunk['size'])
+                if hashlib.sha256(data).hexdigest() != chunk['sha256']:
+                    del state['chunks'][str(i)]
+                    save_state(path, state, settings)
+                    raise TransferError(f"{partial}: checksum mismatch in chunk {i}")
+
+        # Receivers can check every chunk against the manifest
+        manifest = {
+            'file': target,
+            'source': os.path.basename(path),
+            'source_size': stat.st_size,
+            'chunk_size': chunk_size,
+            'compression': 'gzip-members' if level else None,
+            'chunks': chunks,
+        }
+        session.put(target + MANIFEST_SUFFIX, json.dumps(manifest, indent=1).encode())
+        session.rename(partial, target)
+
+    elapsed = time.perf_counter() - started
+    report = {
+        'file': os.path.basename(path),
+        'remote': target,
+        'bytes': stat.st_size,
+        'wire_bytes': total_size,
+        'sent_bytes': wire_bytes,
+        'ratio': round(total_size / stat.st_size, 3) if stat.st_size else 1.0,
+        'chunks': chunk_count,
+        'chunks_resumed': resumed,
+        'streams': streams,
+        'elapsed_seconds': round(elapsed, 2),
+        'mb_per_second': round(stat.st_size / 1e6 / elapsed, 2) if elapsed else None,
+        'wire_mb_per_second': round(wire_bytes / 1e6 / elapsed, 2) if elapsed else None,
+        'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    state.update(complete=True, report=report)
+    save_state(path, state, settings)
+    return report
+
+
+def pending_files(settings=None):
+    """Files in the source directory modified today that match a pattern"""
+    settings = settings or config.TRANSFER
+    today = datetime.now().date()
+    files = []
+    for entry in sorted(os.listdir(settings['source_dir'])):
+        path = os.path.join(settings['source_dir'], entry)
+        if (os.path.isfile(path)
+                and any(fnmatch.fnmatch(entry, p) for p in settings['patterns'])
+                and datetime.fromtimestamp(os.path.getmtime(path)).date() == today):
+            files.append(path)
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress and send reconciliation output files')
+    parser.add_argument('files', nargs='*', help="files to send (default: today's files in source_dir)")
+    parser.add_argument('--dest', help='send to a local directory instead of the configured transport')
+    parser.add_argument('--streams', type=int, help='parallel streams')
+    parser.add_argument('--compress', type=int, default=0, metavar='LEVEL',
+                        help='gzip level for --dest (default: send uncompressed)')
+    parser.add_argument('--force', action='store_true', help='resend files already transferred')
+    parser.add_argument('--json', action='store_true', help='print a machine-readable result')
+    args = parser.parse_args()
+
+    settings = dict(config.TRANSFER)
+    if args.streams:
+        settings['streams'] = args.streams
+    transport = (LocalTransport(args.dest, args.compress) if args.dest
+                 else make_transport(settings['transport']))
+    files = args.files or pending_files(settings)
+
+    reports = []
+    failed = False
+    for path in files:
+        try:
+            report = transfer_file(path, transport, settings, args.force)
+        except (TransferError, OSError, ftplib.Error) as e:
+            failed = True
+            report = {'file': os.path.basename(path), 'error': str(e)}
+        reports.append(report)
+        if args.json:
+            continue
+        if 'error' in report:
+            print(f"❌ {report['file']}: {report['error']} (rerun to resume)")
+        elif report.get('skipped'):
+            print(f"⏭️  {report['file']}: already transferred at {report['finished_at']}")
+        else:
+            print(f"✅ {report['file']} → {report['remote']}: {report['bytes'] / 1e6:,.1f} MB → "
+                  f"{report['wire_bytes'] / 1e6:,.1f} MB ({report['ratio']:.0%}) in {report['elapsed_seconds']}s, "
+                  f"{report['mb_per_second']} MB/s, {report['streams']} streams"
+                  + (f", {report['chunks_resumed']}/{report['chunks']} chunks resumed" if report['chunks_resumed'] else ''))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    sys.exit(1 if failed else 0)